@@ -0,0 +1,55 @@
+import datetime
+
+HEATMAP_DAYS = 365
+
+
+# Per-user set of active days with workout counts. Consecutive active days are
+# tracked as runs (start <-> end maps) merged as days are added, so the current
+# and longest streak are O(1) and the heatmap is O(days shown).
+class ActivityCalendar:
+    def __init__(self, workouts=()):
+        self.counts = {}
+        self._run_start = {}
+        self._run_end = {}
+        self.longest_streak = 0
+        for workout in workouts:
+            self.add(workout)
+
+    def add(self, workout):
+        day = datetime.datetime.fromisoformat(workout["date"]).date().toordinal()
+        self.counts[day] = self.counts.get(day, 0) + 1
+        if self.counts[day] > 1:
+            return
+
+        # New active day: join it with the runs ending the day before / starting the day after
+        start = self._run_start.pop(day - 1, day)
+        end = self._run_end.pop(day + 1, day)
+        self._run_end.pop(start, None)
+        self._run_start.pop(end, None)
+        self._run_end[start] = end
+        self._run_start[end] = start
+        self.longest_streak = max(self.longest_streak, end - start + 1)
+
+    def current_streak(self, today=None):
+        # A streak stays alive through today if yesterday was active
+        today = (today or datetime.date.today()).toordinal()
+        for end in (today, today - 1):
+            start = self._run_start.get(end)
+            if start is not None:
+                return end - start + 1
+        return 0
+
+    def heatmap(self, today=None, days=HEATMAP_DAYS):
+        # GitHub-style matrix: 7 rows (Mon..Sun) x one column per week, oldest week
+        # first. Returns (matrix, first_monday); cells outside the range are None.
+        today = today or datetime.date.today()
+        first_day = today - datetime.timedelta(days=days - 1)
+        first_monday = first_day - datetime.timedelta(days=first_day.weekday())
+        weeks = (today - first_monday).days // 7 + 1
+        matrix = [[None] * weeks for _ in range(7)]
+        first_ordinal = first_day.toordinal()
+        monday_ordinal = first_monday.toordinal()
+        for ordinal in range(first_ordinal, today.toordinal() + 1):
+            offset = ordinal - monday_ordinal
+            matrix[offset % 7][offset // 7] = self.counts.get(ordinal, 0)
+        return matrix, first_monday
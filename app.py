@@ -9,6 +9,30 @@ from PIL import Image
 import os
 from io import BytesIO
 import base64
+import uuid
+import time
+import atexit
+from contextlib import contextmanager
+from streamlit.errors import StreamlitAPIException
+from news_service import NewsFetchScheduler, QuotaExhausted, PRIORITY_USER, PRIORITY_BACKGROUND, newsapi_url, parse_newsapi_response
+from chat_log import ChatHistory
+from news_search import NewsSearchIndex
+from workout_trends import trend_series, workout_minutes
+from training_load import TrainingLoad
+from activity_calendar import ActivityCalendar
+from workout_rollups import WorkoutRollups
+from quantile_sketch import DurationSketches, MIN_COHORT_SESSIONS
+from leaderboards import Leaderboards, ALL_SPORTS
+from workout_recommender import WorkoutRecommender, format_recommendation
+from nutrition import nutrition_targets, DEFAULT_WEIGHT_KG, DEFAULT_HEIGHT_CM, DEFAULT_AGE
+from meal_planner import meal_plan, timing_note
+from goals import add_goal, remove_goal, record_workout, goal_status, format_goal_status
+from scheduler import JobScheduler
+from training_reminders import ReminderBoard
+from workout_batch import BatchError, BATCH_COLUMNS, validate_workouts, merge_history
+from session_files import SESSION_FILE_TYPES, ingest_session_files, session_series
+from session_store import SessionStore
+from news_store import NewsStore
 
 # Set page config
 st.set_page_config(
@@ -149,111 +173,406 @@ def init_session_state():
     if 'workouts' not in st.session_state:
         st.session_state.workouts = {}
     
+    # Bumped on every change to a user's workouts; derived Progress data is cached per version
+    if 'workout_versions' not in st.session_state:
+        st.session_state.workout_versions = {}
+    
+    # Derived per-user structures, kept current by index_workouts as workouts are logged
+    if 'training_loads' not in st.session_state:
+        rebuild_workout_indexes()
+    
+    # Workouts live in session state, so cached views must not be shared between sessions
+    if 'workout_store_id' not in st.session_state:
+        st.session_state.workout_store_id = uuid.uuid4().hex
+    
     if 'current_user' not in st.session_state:
         st.session_state.current_user = "default"
     
-    if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+    # One windowed ChatHistory per user; older messages live in the on-disk chat log
+    if 'chat_histories' not in st.session_state:
+        st.session_state.chat_histories = {}
+    
+    if 'chat_older_pages' not in st.session_state:
+        st.session_state.chat_older_pages = 0
     
     if 'news_data' not in st.session_state:
         st.session_state.news_data = []
 
+# Number of stored articles shown in the News tab
+NEWS_HISTORY_SIZE = 20
+
+# Chat messages rendered per page; older ones are paged in from the chat log
+CHAT_WINDOW = 50
+
+# Page sizes offered for the Progress tab workout history
+HISTORY_PAGE_SIZES = [10, 25, 50, 100]
+
+# Upper bound on cached Progress views across all sessions and users
+PROGRESS_CACHE_SIZE = 512
+
+# Scheduled jobs (seconds)
+NEWS_PREFETCH_INTERVAL = 15 * 60
+NEWS_CACHE_EVICTION_INTERVAL = 60 * 60
+NEWS_CACHE_MAX_AGE = 6 * 60 * 60
+REMINDER_CHECK_INTERVAL = 15 * 60
+
+# Workout logging choices, and blank rows offered by the multi-row entry
+WORKOUT_SPORTS = ["Football", "Basketball", "Tennis", "Running", "Cycling", "Swimming", "Other"]
+WORKOUT_TYPES = ["Cardio", "Strength", "Flexibility", "Skills", "Game", "Other"]
+BATCH_ROWS = 5
+
+# Charts for an opened session: (series, axis label)
+SESSION_CHART_LINES = [("heart_rate", "Heart rate (bpm)"), ("speed", "Speed (km/h)"), ("elevation", "Elevation (m)")]
+
 # Sports News API integration
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def get_latest_news(sport="sports", count=5):
+@st.cache_resource
+def get_news_scheduler():
+    # One scheduler per server process: every session shares the coalescer and the NewsAPI quota.
+    # Without budget or a result in memory it serves what the store has from earlier runs.
+    store = get_news_store()
+    return NewsFetchScheduler(stored=lambda key: store.articles(*key))
+
+@st.cache_resource
+def get_news_index():
+    # Streamlit has no shutdown hook; close the SQLite connection when the server exits
+    index = NewsSearchIndex()
+    atexit.register(index.close)
+    return index
+
+@st.cache_resource
+def get_news_store():
+    return NewsStore(index=get_news_index())
+
+def get_latest_news(sport="sports", count=5, priority=PRIORITY_USER):
+    # Failures are reported here, outside the cache, so an empty result is never
+    # memoized and the next call tries again
     try:
-        # Try to get from environment or use placeholder
-        api_key = os.getenv('NEWS_API_KEY')
-        if not api_key:
-            # Return sample news if no API key
-            return [
-                {
-                    'title': f"Latest {sport.title()} News",
-                    'description': f"Stay updated with the latest {sport} news and updates. Our news service will provide real-time updates when API key is configured.",
-                    'url': "#",
-                    'image_url': "",
-                    'published_at': datetime.datetime.now().isoformat()
-                }
-            ]
-            
-        url = f"https://newsapi.org/v2/everything?q={sport}&language=en&sortBy=publishedAt&apiKey={api_key}"
-        response = requests.get(url, timeout=10)
-        articles = response.json().get('articles', [])[:count]
-        
-        formatted_articles = []
-        for article in articles:
-            formatted_articles.append({
-                'title': article.get('title', 'No title'),
-                'description': article.get('description', 'No description'),
-                'url': article.get('url', '#'),
-                'image_url': article.get('urlToImage', ''),
-                'published_at': article.get('publishedAt', datetime.datetime.now().isoformat())
-            })
-        return formatted_articles
+        return fetch_news_articles(sport, count, priority)
+    except QuotaExhausted:
+        st.warning("The daily news quota has been reached. Please check back later.")
     except Exception as e:
         st.error(f"Error fetching news: {e}")
-        return []
+    return []
+
+@st.cache_data(ttl=3600)  # Cache for 1 hour
+def fetch_news_articles(sport, count, priority):
+    # Only article lists are cached; quota exhaustion and fetch errors raise
+    api_key = os.getenv('NEWS_API_KEY')
+    if not api_key:
+        # Return sample news if no API key
+        return [
+            {
+                'title': f"Latest {sport.title()} News",
+                'description': f"Stay updated with the latest {sport} news and updates. Our news service will provide real-time updates when API key is configured.",
+                'url': "#",
+                'image_url': "",
+                'published_at': datetime.datetime.now().isoformat()
+            }
+        ]
+    
+    articles = get_news_scheduler().fetch((sport, count), fetch_latest_news, get_news_store(), sport, count, api_key,
+                                           priority=priority)
+    if articles is None:
+        # Out of quota and nothing cached or stored for this query yet
+        raise QuotaExhausted("News quota exhausted and nothing cached yet")
+    return articles
+
+@st.cache_resource
+def get_prefetch_sports():
+    # Sports someone has opened the News tab for; the prefetch job keeps them warm
+    return set()
+
+def prefetch_news(scheduler, store, sports):
+    # Runs on the job scheduler's thread: every resource is passed in, no Streamlit API is called
+    api_key = os.getenv('NEWS_API_KEY')
+    if not api_key:
+        return
+    for sport in list(sports):
+        # Background priority: only spends quota above the reserve kept for user requests
+        scheduler.fetch((sport, NEWS_HISTORY_SIZE), fetch_latest_news, store, sport, NEWS_HISTORY_SIZE, api_key,
+                        priority=PRIORITY_BACKGROUND)
+
+@st.cache_resource
+def get_job_scheduler():
+    # One scheduler thread per server process, sleeping until the next job is due. The
+    # cached resources are resolved here, on the script thread, and handed to the jobs:
+    # the scheduler thread has no script context and must not call Streamlit APIs.
+    scheduler = JobScheduler()
+    news_scheduler = get_news_scheduler()
+    scheduler.every("news-prefetch", NEWS_PREFETCH_INTERVAL, prefetch_news, news_scheduler, get_news_store(),
+                    get_prefetch_sports())
+    scheduler.every("news-cache-eviction", NEWS_CACHE_EVICTION_INTERVAL, news_scheduler.evict, NEWS_CACHE_MAX_AGE)
+    scheduler.every("training-reminders", REMINDER_CHECK_INTERVAL, get_reminder_board().check, delay=5)
+    scheduler.start()
+    return scheduler
+
+def fetch_latest_news(store, sport, count, api_key):
+    # Only the delta since the newest stored article goes over the wire
+    url = newsapi_url(sport, api_key, since=store.latest_published(sport))
+    response = requests.get(url, timeout=10)
+    articles = parse_newsapi_response(response)
+    
+    formatted_articles = []
+    for article in articles:
+        formatted_articles.append({
+            'title': article.get('title', 'No title'),
+            'description': article.get('description', 'No description'),
+            'url': article.get('url', '#'),
+            'image_url': article.get('urlToImage', ''),
+            'published_at': article.get('publishedAt', datetime.datetime.now().isoformat())
+        })
+    store.ingest(sport, formatted_articles)
+    return store.articles(sport, count)
 
 # Workout tracking functions
 def log_workout(user, sport, workout_type, duration, intensity, notes=""):
-    if user not in st.session_state.workouts:
-        st.session_state.workouts[user] = []
-    
-    workout = {
-        "date": datetime.datetime.now().isoformat(),
+    return log_workouts(user, [{
         "sport": sport,
         "type": workout_type,
         "duration": duration,
         "intensity": intensity,
         "notes": notes
-    }
+    }])[0]
+
+def log_workouts(user, records):
+    # Validates the whole batch first (BatchError, nothing applied, if any row is bad),
+    # then updates the indexes and bumps the workout version once for the batch
+    workouts = validate_workouts(records)
+    if not workouts:
+        return []
+    if user not in st.session_state.workouts:
+        st.session_state.workouts[user] = []
+    
+    merge_history(st.session_state.workouts[user], workouts)
+    index_workouts(user, workouts)
+    bump_workout_version(user)
+    
+    # Shared by every session, so only newly logged workouts feed it
+    level = st.session_state.user_profiles.get(user, {}).get("level", "beginner")
+    sketches = get_duration_sketches()
+    reminders = get_reminder_board()
+    for workout in workouts:
+        sketches.add(workout["sport"], level, workout_minutes(workout))
+        reminders.add(user, workout)
+    get_leaderboards().add_many(user, workouts)
+    get_recommender().add_many(user, workouts)
     
-    st.session_state.workouts[user].append(workout)
-    return workout
+    # Goal counters and workouts_completed are updated per event, stored on the profile
+    if user in st.session_state.user_profiles:
+        for workout in workouts:
+            record_workout(st.session_state.user_profiles[user], workout)
+    return workouts
+
+@st.cache_resource
+def get_session_store():
+    # Per-sample data of imported session files, read only when a session is opened
+    return SessionStore()
+
+def import_sessions(user, files, sport=None):
+    # Parses and stores the uploaded files, then logs them as one batch:
+    # (workouts, [(file name, problem)])
+    store = get_session_store()
+    known = {workout["session"] for workout in st.session_state.workouts.get(user, []) if workout.get("session")}
+    records, errors = ingest_session_files(files, store, user, sport, st.session_state.user_profiles.get(user), known)
+    if not records:
+        return [], errors
+    try:
+        return log_workouts(user, records), errors
+    except BatchError as e:
+        for record in records:
+            store.remove(user, record["session"])
+        return [], errors + [(records[row - 1]["notes"], message) for row, message in e.errors]
+
+@st.cache_resource
+def get_reminder_board():
+    # Training patterns and due reminders for every user; checked by the job scheduler
+    return ReminderBoard()
+
+@st.cache_resource
+def get_recommender():
+    # Training profiles of every user of this server, for "athletes like you" suggestions
+    return WorkoutRecommender()
+
+@st.cache_resource
+def get_leaderboards():
+    # Weekly and all-time rankings across every user of this server
+    return Leaderboards()
+
+@st.cache_resource
+def get_duration_sketches():
+    # Session-length distribution per sport and level across every user of this server
+    return DurationSketches()
+
+def get_duration_ranks(user):
+    # [(sport, average minutes, share of the sport/level cohort at or below it)],
+    # for cohorts with at least MIN_COHORT_SESSIONS sessions from other users
+    level = st.session_state.user_profiles.get(user, {}).get("level", "beginner")
+    sketches = get_duration_sketches()
+    ranks = []
+    for sport, entry in get_workout_rollups(user).totals["by_sport"].items():
+        if sketches.cohort_size(sport, level) - entry["count"] < MIN_COHORT_SESSIONS:
+            continue
+        average = entry["minutes"] / max(1, entry["count"])
+        percentile = sketches.percentile(sport, level, average)
+        if percentile is not None:
+            ranks.append((sport, average, percentile))
+    return ranks
+
+def rebuild_workout_indexes():
+    st.session_state.workout_rollups = {}
+    st.session_state.training_loads = {}
+    st.session_state.activity_calendars = {}
+    for user, workouts in st.session_state.workouts.items():
+        index_workouts(user, workouts)
+
+def index_workouts(user, workouts):
+    if user not in st.session_state.workout_rollups:
+        st.session_state.workout_rollups[user] = WorkoutRollups()
+    if user not in st.session_state.training_loads:
+        st.session_state.training_loads[user] = TrainingLoad()
+    if user not in st.session_state.activity_calendars:
+        st.session_state.activity_calendars[user] = ActivityCalendar()
+    for workout in workouts:
+        st.session_state.workout_rollups[user].add(workout)
+        st.session_state.training_loads[user].add(workout)
+        st.session_state.activity_calendars[user].add(workout)
+
+def get_activity_calendar(user):
+    if user not in st.session_state.activity_calendars:
+        return ActivityCalendar()
+    return st.session_state.activity_calendars[user]
+
+def get_training_load(user):
+    if user not in st.session_state.training_loads:
+        return TrainingLoad().summary()
+    return st.session_state.training_loads[user].summary()
+
+def bump_workout_version(user):
+    st.session_state.workout_versions[user] = st.session_state.workout_versions.get(user, 0) + 1
+
+def get_workout_version(user):
+    return st.session_state.workout_versions.get(user, 0)
 
 def get_workout_history(user, limit=5):
     return st.session_state.workouts.get(user, [])[-limit:]
 
-def get_progress_stats(user):
-    stats = {
-        "total_workouts": 0,
-        "workouts_by_sport": {},
-        "weekly_avg": 0,
-        "total_duration": 0
+def get_workout_page(user, offset=0, limit=50):
+    # Newest first; only the requested slice is copied, however long the history
+    workouts = st.session_state.workouts.get(user, [])
+    total = len(workouts)
+    offset = max(0, min(offset, max(0, total - 1)))
+    end = total - offset
+    page = workouts[max(0, end - limit):end][::-1]
+    next_offset = offset + len(page)
+    return {
+        "workouts": page,
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "next_offset": next_offset if next_offset < total else None
     }
+
+def get_workout_rollups(user):
+    return st.session_state.workout_rollups.get(user) or WorkoutRollups()
+
+def get_progress_stats(user):
+    # Served from the materialized rollups rather than a scan of the history
+    return get_workout_rollups(user).progress_stats()
+
+# Progress tab data (stats, recent workouts table, charts) for one user, reused
+# across reruns until that user's workouts change. The day is part of the key
+# because the weekly average depends on today's date.
+def get_progress_view(user):
+    return build_progress_view(
+        st.session_state.workout_store_id,
+        user,
+        get_workout_version(user),
+        datetime.date.today(),
+        get_workout_rollups(user),
+        get_activity_calendar(user)
+    )
+
+@st.cache_resource(max_entries=PROGRESS_CACHE_SIZE, show_spinner=False)
+def build_progress_view(store_id, user, version, day, _rollups, _calendar):
+    stats = _rollups.progress_stats(day)
+    view = {"stats": stats, "fig_pie": None, "fig_bar": None}
     
-    if user not in st.session_state.workouts:
-        return stats
-    
-    workouts = st.session_state.workouts[user]
-    stats["total_workouts"] = len(workouts)
+    view["current_streak"] = _calendar.current_streak(day)
+    view["longest_streak"] = _calendar.longest_streak
+    matrix, first_monday = _calendar.heatmap(day)
+    view["fig_heatmap"] = go.Figure(go.Heatmap(
+        z=matrix,
+        x=[first_monday + datetime.timedelta(weeks=week) for week in range(len(matrix[0]))],
+        y=["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"],
+        colorscale="Greens",
+        hoverongaps=False
+    ))
+    view["fig_heatmap"].update_layout(title="Activity (last 365 days)", height=260, yaxis=dict(autorange="reversed"))
     
-    for workout in workouts:
-        sport = workout["sport"]
-        if sport not in stats["workouts_by_sport"]:
-            stats["workouts_by_sport"][sport] = 0
-        stats["workouts_by_sport"][sport] += 1
-        
-        try:
-            stats["total_duration"] += int(workout["duration"])
-        except:
-            pass
+    if stats["workouts_by_sport"]:
+        # Pie chart of workouts by sport
+        view["fig_pie"] = px.pie(
+            values=list(stats["workouts_by_sport"].values()),
+            names=list(stats["workouts_by_sport"].keys()),
+            title="Workouts by Sport"
+        )
+        
+        # Bar chart
+        view["fig_bar"] = px.bar(
+            x=list(stats["workouts_by_sport"].keys()),
+            y=list(stats["workouts_by_sport"].values()),
+            title="Workout Count by Sport",
+            labels={'x': 'Sport', 'y': 'Count'}
+        )
     
-    if workouts:
-        first_date = datetime.datetime.fromisoformat(workouts[0]["date"])
-        weeks = max(1, (datetime.datetime.now() - first_date).days / 7)
-        stats["weekly_avg"] = len(workouts) / weeks
+    # Bucketed and downsampled, so the figure stays the same size however long the history
+    trends = trend_series(_rollups.daily_rows(), weekly_rows=_rollups.weekly_rows())
+    view["fig_trend"] = None
+    if trends["minutes"]:
+        fig_trend = go.Figure()
+        fig_trend.add_trace(go.Scatter(
+            x=[day for day, _ in trends["minutes"]],
+            y=[value for _, value in trends["minutes"]],
+            mode="lines", name="Minutes"
+        ))
+        fig_trend.add_trace(go.Scatter(
+            x=[day for day, _ in trends["volume"]],
+            y=[value for _, value in trends["volume"]],
+            mode="lines", name="Training Volume", yaxis="y2"
+        ))
+        fig_trend.update_layout(
+            title=f"Training Trend (per {trends['bucket']})",
+            yaxis=dict(title="Minutes"),
+            yaxis2=dict(title="Volume", overlaying="y", side="right")
+        )
+        view["fig_trend"] = fig_trend
     
-    return stats
+    return view
+
+def get_chat_history(user):
+    histories = st.session_state.chat_histories
+    if user not in histories:
+        histories[user] = ChatHistory(user, window=CHAT_WINDOW)
+    return histories[user]
+
+def render_chat_message(message):
+    if message["sender"] == "user":
+        st.markdown(f'<div class="chat-message user-message"><strong>You:</strong> {message["content"]}</div>', unsafe_allow_html=True)
+    else:
+        st.markdown(f'<div class="chat-message assistant-message"><strong>SportsPal:</strong> {message["content"]}</div>', unsafe_allow_html=True)
 
 # Simple chatbot response
-def get_sports_response(user_input, user_profile):
+def get_sports_response(user_input, user_profile, user=None):
     user_input_lower = user_input.lower()
     sport = user_profile["sport"]
     level = user_profile["level"]
     
     # Simple keyword-based responses
     if any(word in user_input_lower for word in ["workout", "exercise", "training"]):
+        # Prefer what athletes with a similar training history actually do
+        suggestions = get_recommender().recommend(user) if user else []
+        if suggestions:
+            return "Athletes who train like you also do:\n" + "\n".join([f"• {format_recommendation(s)}" for s in suggestions])
         if sport in SPORTS_KNOWLEDGE and level in SPORTS_KNOWLEDGE[sport]["workouts"]:
             workouts = SPORTS_KNOWLEDGE[sport]["workouts"][level]
             return f"Here are some {level} {sport} workouts for you:\n" + "\n".join([f"• {w}" for w in workouts])
@@ -283,9 +602,48 @@ def get_sports_response(user_input, user_profile):
     else:
         return f"As your sports assistant, I can help you with workouts, diet advice, rules, and equipment recommendations for {sport}. What would you like to know more about?"
 
+# Server-side render time per region. Fragment reruns only record their own
+# region, a full rerun records "full_run" as well; set SPORTSPAL_TIMINGS=1 to
+# also print them to the server log.
+RENDER_TIMINGS_KEEP = 200
+
+@contextmanager
+def timed_region(region):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timings = st.session_state.setdefault('render_timings', [])
+        timings.append({"region": region, "ms": elapsed_ms})
+        del timings[:-RENDER_TIMINGS_KEEP]
+        if os.getenv('SPORTSPAL_TIMINGS'):
+            print(f"[timing] {region}: {elapsed_ms:.1f} ms")
+
+# SPORTSPAL_FRAGMENTS=0 renders every region inline, the way the app worked before
+# they were fragments, so bench_app.py can time the same clicks both ways
+FRAGMENTS_ENABLED = os.getenv('SPORTSPAL_FRAGMENTS', '1') != '0'
+
+def region_fragment(func):
+    return st.fragment(func) if FRAGMENTS_ENABLED else func
+
+def rerun_fragment():
+    # Clicks inside a fragment arrive as fragment reruns, so only that region
+    # redraws. A full run (first load, a plain AppTest run, or fragments turned
+    # off) can't scope the rerun.
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
 # Main app
 def main():
+    with timed_region("full_run"):
+        render_app()
+
+def render_app():
     init_session_state()
+    get_job_scheduler()
     
     # Header
     st.markdown("""
@@ -303,6 +661,7 @@ def main():
         current_user = st.text_input("Username", value=st.session_state.current_user)
         if current_user != st.session_state.current_user:
             st.session_state.current_user = current_user
+            st.session_state.chat_older_pages = 0
             if current_user not in st.session_state.user_profiles:
                 st.session_state.user_profiles[current_user] = {
                     "sport": "general",
@@ -335,67 +694,130 @@ def main():
         st.divider()
         
         # Quick stats
-        stats = get_progress_stats(current_user)
+        stats = get_progress_view(current_user)["stats"]
         st.metric("Total Workouts", stats["total_workouts"])
         st.metric("Total Duration", f"{stats['total_duration']} mins")
         st.metric("Weekly Average", f"{stats['weekly_avg']:.1f}")
+        
+        st.divider()
+        
+        reminder = get_reminder_board().pending_for(current_user)
+        if reminder:
+            st.warning(f"⏰ {reminder}")
+        
+        # Goals, read from the per-goal counters on the profile
+        st.subheader("🎯 Goals")
+        render_goal_status(user_profile)
+        
+        new_goal = st.text_input("New goal", placeholder="e.g. 150 min/week, 3 tennis sessions/week",
+                                 key="new_goal")
+        if st.button("Add Goal") and new_goal.strip():
+            if add_goal(user_profile, new_goal, get_workout_rollups(current_user)) is None:
+                st.session_state.goal_message = (f"'{new_goal.strip()}' was added as a note. Use a form like "
+                                                 f"'150 min/week' to have it tracked automatically.")
+            del st.session_state["new_goal"]
+            st.rerun()
+        if user_profile.get("goals"):
+            goal_to_remove = st.selectbox("Goal to remove", user_profile["goals"], key="goal_to_remove")
+            if st.button("Remove Goal"):
+                remove_goal(user_profile, goal_to_remove)
+                st.rerun()
+        if 'goal_message' in st.session_state:
+            st.info(st.session_state.pop('goal_message'))
     
     # Main content tabs
     tab1, tab2, tab3, tab4, tab5 = st.tabs(["💬 Chat", "📰 Sports News", "📊 Progress", "🏋️ Log Workout", "🥗 Diet Plans"])
     
-    # Chat Tab
     with tab1:
+        render_chat_tab(current_user, user_profile)
+    
+    with tab2:
+        render_news_tab(sport)
+    
+    with tab3:
+        render_progress_tab(current_user)
+    
+    with tab4:
+        render_log_workout_tab(current_user)
+    
+    with tab5:
+        render_diet_tab(current_user, sport)
+
+# Chat Tab
+@region_fragment
+def render_chat_tab(current_user, user_profile):
+    with timed_region("chat"):
         st.header("Chat with SportsPal")
         
-        # Display chat history
+        chat_history = get_chat_history(current_user)
+        older_pages = st.session_state.chat_older_pages
+        
+        if chat_history.has_older(older_pages, CHAT_WINDOW):
+            if st.button("Load older messages"):
+                st.session_state.chat_older_pages += 1
+                rerun_fragment()
+        
+        # Display chat history: requested pages from the log, then the live window
         chat_container = st.container()
         with chat_container:
-            for message in st.session_state.chat_history:
-                if message["sender"] == "user":
-                    st.markdown(f'<div class="chat-message user-message"><strong>You:</strong> {message["content"]}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown(f'<div class="chat-message assistant-message"><strong>SportsPal:</strong> {message["content"]}</div>', unsafe_allow_html=True)
+            for page in range(older_pages - 1, -1, -1):
+                for message in chat_history.load_older(page, CHAT_WINDOW):
+                    render_chat_message(message)
+            for message in chat_history.messages:
+                render_chat_message(message)
         
         # Chat input
         user_input = st.text_input("Ask me anything about sports, workouts, or nutrition:", key="chat_input")
         col1, col2 = st.columns([1, 4])
         
         with col1:
-            if st.button("Send", type="primary"):
+            if st.button("Send", type="primary", key="chat_send"):
                 if user_input:
                     # Add user message
-                    st.session_state.chat_history.append({"sender": "user", "content": user_input})
+                    chat_history.append("user", user_input)
                     
                     # Get response
-                    response = get_sports_response(user_input, user_profile)
-                    st.session_state.chat_history.append({"sender": "assistant", "content": response})
+                    response = get_sports_response(user_input, user_profile, current_user)
+                    chat_history.append("assistant", response)
                     
-                    st.rerun()
+                    # Only the chat region needs to redraw
+                    rerun_fragment()
         
         with col2:
-            if st.button("Clear Chat"):
-                st.session_state.chat_history = []
-                st.rerun()
-    
-    # News Tab
-    with tab2:
+            if st.button("Clear Chat", key="chat_clear"):
+                chat_history.clear()
+                st.session_state.chat_older_pages = 0
+                rerun_fragment()
+
+# News Tab
+@region_fragment
+def render_news_tab(sport):
+    with timed_region("news"):
         st.header("📰 Latest Sports News")
+        get_prefetch_sports().add(sport)
         
         col1, col2 = st.columns([1, 3])
         with col1:
-            if st.button("Refresh News"):
-                st.session_state.news_data = get_latest_news(sport)
-                st.rerun()
+            if st.button("Refresh News", key="news_refresh"):
+                st.session_state.news_data = get_latest_news(sport, NEWS_HISTORY_SIZE)
+                rerun_fragment()
         
         if not st.session_state.news_data:
-            st.session_state.news_data = get_latest_news(sport)
+            st.session_state.news_data = get_latest_news(sport, NEWS_HISTORY_SIZE)
+        
+        search_query = st.text_input("Search news", key="news_search").strip()
+        if search_query:
+            articles = get_news_index().search(search_query, limit=NEWS_HISTORY_SIZE)
+            st.caption(f"{len(articles)} article(s) matching '{search_query}'")
+        else:
+            articles = st.session_state.news_data
         
-        for article in st.session_state.news_data:
+        for article in articles:
             with st.expander(article['title']):
                 col1, col2 = st.columns([2, 1])
                 with col1:
                     st.write(article['description'])
-                    if article['url'] != "#":
+                    if article['url'] and article['url'] != "#":
                         st.link_button("Read Full Article", article['url'])
                     st.caption(f"Published: {datetime.datetime.fromisoformat(article['published_at']).strftime('%Y-%m-%d %H:%M')}")
                 
@@ -405,12 +827,14 @@ def main():
                             st.image(article['image_url'], width=200)
                         except:
                             st.write("Image unavailable")
-    
-    # Progress Tab
-    with tab3:
+
+# Progress Tab
+def render_progress_tab(current_user):
+    with timed_region("progress"):
         st.header("📊 Your Progress")
         
-        stats = get_progress_stats(current_user)
+        progress_view = get_progress_view(current_user)
+        stats = progress_view["stats"]
         
         # Metrics row
         col1, col2, col3, col4 = st.columns(4)
@@ -424,70 +848,260 @@ def main():
             avg_duration = stats['total_duration'] / max(1, stats['total_workouts'])
             st.metric("Avg Duration", f"{avg_duration:.1f} mins")
         
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Current Streak", f"{progress_view['current_streak']} days")
+        with col2:
+            st.metric("Longest Streak", f"{progress_view['longest_streak']} days")
+        
+        level = st.session_state.user_profiles[current_user]["level"]
+        for sport, average, percentile in get_duration_ranks(current_user):
+            st.caption(f"⏱️ Your {sport} sessions average {average:.0f} min, longer than "
+                       f"{percentile * 100:.0f}% of {level} {sport.lower()} players")
+        
+        st.subheader("🎯 Goals")
+        render_goal_status(st.session_state.user_profiles[current_user])
+        
+        suggestions = get_recommender().recommend(current_user)
+        if suggestions:
+            st.markdown("**Athletes who train like you also do:**\n" + "\n".join(
+                f"- {format_recommendation(s)}" for s in suggestions
+            ))
+        
+        # Training load (AU = minutes x intensity factor)
+        load = get_training_load(current_user)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Acute Load (7d)", f"{load['acute']:.0f} AU/day")
+        with col2:
+            st.metric("Chronic Load (28d)", f"{load['chronic']:.0f} AU/day")
+        with col3:
+            st.metric("Acute:Chronic Ratio", f"{load['acwr']:.2f}")
+        with col4:
+            st.metric("Monotony / Strain", f"{load['monotony']:.2f} / {load['strain']:.0f}")
+        
         # Charts
         if stats["workouts_by_sport"]:
             col1, col2 = st.columns(2)
             
             with col1:
-                # Pie chart of workouts by sport
-                fig_pie = px.pie(
-                    values=list(stats["workouts_by_sport"].values()),
-                    names=list(stats["workouts_by_sport"].keys()),
-                    title="Workouts by Sport"
-                )
-                st.plotly_chart(fig_pie, use_container_width=True)
+                st.plotly_chart(progress_view["fig_pie"], use_container_width=True)
             
             with col2:
-                # Bar chart
-                fig_bar = px.bar(
-                    x=list(stats["workouts_by_sport"].keys()),
-                    y=list(stats["workouts_by_sport"].values()),
-                    title="Workout Count by Sport",
-                    labels={'x': 'Sport', 'y': 'Count'}
-                )
-                st.plotly_chart(fig_bar, use_container_width=True)
-        
-        # Recent workouts
-        st.subheader("Recent Workouts")
-        recent_workouts = get_workout_history(current_user, 10)
-        
-        if recent_workouts:
-            df = pd.DataFrame(recent_workouts)
+                st.plotly_chart(progress_view["fig_bar"], use_container_width=True)
+        
+        if progress_view["fig_trend"] is not None:
+            st.plotly_chart(progress_view["fig_trend"], use_container_width=True)
+        
+        st.plotly_chart(progress_view["fig_heatmap"], use_container_width=True)
+        
+        render_leaderboard(current_user)
+        
+        # Workout history, one page at a time so long histories never become one big DataFrame
+        st.subheader("Workout History")
+        
+        if stats["total_workouts"]:
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                page_size = st.selectbox("Rows per page", HISTORY_PAGE_SIZES, key="history_page_size")
+            page_count = max(1, -(-stats["total_workouts"] // page_size))
+            with col2:
+                page_number = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count,
+                                              value=1, key="history_page")
+            
+            page = get_workout_page(current_user, (page_number - 1) * page_size, page_size)
+            df = pd.DataFrame(page["workouts"])
             df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d %H:%M')
-            st.dataframe(df, use_container_width=True)
+            st.dataframe(df, use_container_width=True, hide_index=True)
+            
+            sessions = [workout for workout in page["workouts"] if workout.get("session")]
+            if sessions:
+                render_session_details(current_user, sessions)
         else:
             st.info("No workouts logged yet. Use the 'Log Workout' tab to get started!")
+
+def render_session_details(current_user, sessions):
+    # Imported sessions on the current history page; only the chosen one's samples are read
+    choice = st.selectbox("Session details", [None] + sessions, key="history_session",
+                          format_func=lambda w: "Choose a session..." if w is None else
+                          f"{w['date'][:16].replace('T', ' ')} - {w['sport']}, {w['duration']} mins")
+    if choice is None:
+        return
+    details = [f"{choice['intensity']} intensity"]
+    if choice.get("distance_km") is not None:
+        details.append(f"{choice['distance_km']} km")
+    if choice.get("avg_heart_rate") is not None:
+        details.append(f"avg {choice['avg_heart_rate']} bpm")
+    st.caption(", ".join(details))
     
-    # Workout Logging Tab
-    with tab4:
+    samples = get_session_store().open(current_user, choice["session"])
+    if samples is None:
+        st.info("The samples for this session are not available.")
+        return
+    series = session_series(samples)
+    for name, label in SESSION_CHART_LINES:
+        if name in series:
+            fig = px.line(pd.DataFrame(series[name], columns=["Minutes", label]), x="Minutes", y=label, height=220)
+            fig.update_layout(margin=dict(l=0, r=0, t=10, b=0))
+            st.plotly_chart(fig, use_container_width=True)
+
+def render_goal_status(user_profile):
+    for entry in goal_status(user_profile):
+        if entry["target"] is None:
+            st.caption(f"• {entry['text']}")
+        else:
+            st.progress(entry["fraction"], text=format_goal_status(entry))
+
+# Leaderboard: changing the window, metric or sport only redraws this fragment
+@region_fragment
+def render_leaderboard(current_user):
+    with timed_region("leaderboard"):
+        st.subheader("🏆 Leaderboard")
+        leaderboards = get_leaderboards()
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            window = st.selectbox("Period", ["week", "all"], key="leaderboard_window",
+                                  format_func=lambda w: "This week" if w == "week" else "All time")
+        with col2:
+            metric = st.selectbox("Ranked by", ["minutes", "workouts"], key="leaderboard_metric",
+                                  format_func=str.title)
+        with col3:
+            sport = st.selectbox("Sport", [ALL_SPORTS] + leaderboards.sports(), key="leaderboard_sport")
+        
+        top = leaderboards.top(metric, sport, window)
+        if not top:
+            st.info("No workouts logged for this period yet.")
+            return
+        
+        st.dataframe(pd.DataFrame([
+            {"Rank": position, "User": user, metric.title(): score}
+            for position, (user, score) in enumerate(top, start=1)
+        ]), use_container_width=True, hide_index=True)
+        
+        rank = leaderboards.rank(current_user, metric, sport, window)
+        if rank is not None:
+            st.caption(f"You are #{rank} of {leaderboards.size(metric, sport, window)}")
+
+# Workout Logging Tab
+@region_fragment
+def render_log_workout_tab(current_user):
+    with timed_region("log_workout"):
         st.header("🏋️ Log Your Workout")
         
+        # Set just before the full rerun that follows a successful log
+        logged_message = st.session_state.pop('workout_logged_message', None)
+        if logged_message:
+            st.success(logged_message)
+            st.balloons()
+        
         with st.form("workout_form"):
             col1, col2 = st.columns(2)
             
             with col1:
-                workout_sport = st.selectbox("Sport", ["Football", "Basketball", "Tennis", "Running", "Cycling", "Swimming", "Other"])
-                workout_type = st.selectbox("Workout Type", ["Cardio", "Strength", "Flexibility", "Skills", "Game", "Other"])
+                workout_sport = st.selectbox("Sport", WORKOUT_SPORTS)
+                workout_type = st.selectbox("Workout Type", WORKOUT_TYPES)
                 duration = st.number_input("Duration (minutes)", min_value=1, max_value=300, value=30)
             
             with col2:
                 intensity = st.select_slider("Intensity", ["Low", "Medium", "High"], value="Medium")
                 notes = st.text_area("Notes (optional)")
             
-            submitted = st.form_submit_button("Log Workout", type="primary")
+            submitted = st.form_submit_button("Log Workout", type="primary", key="log_workout")
             
             if submitted:
                 workout = log_workout(current_user, workout_sport, workout_type, duration, intensity, notes)
-                st.success(f"✅ Logged {workout_type} workout for {duration} minutes!")
-                st.balloons()
-    
-    # Diet Plans Tab
-    with tab5:
+                st.session_state.workout_logged_message = f"✅ Logged {workout_type} workout for {duration} minutes!"
+                # The sidebar stats and Progress tab live outside this fragment. A full
+                # rerun refreshes them; chat and news come from session state and the
+                # unchanged Progress data from the versioned cache, so it stays cheap.
+                st.rerun(scope="app")
+        
+        # Several sessions at once (a week's training, a paste from a spreadsheet),
+        # validated together and applied as one update
+        st.subheader("Log Several Workouts")
+        with st.form("workout_batch_form"):
+            rows = st.data_editor(
+                pd.DataFrame({column: pd.Series([None] * BATCH_ROWS, dtype=object) for column in BATCH_COLUMNS}),
+                num_rows="dynamic",
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "sport": st.column_config.SelectboxColumn("Sport", options=WORKOUT_SPORTS),
+                    "type": st.column_config.SelectboxColumn("Workout Type", options=WORKOUT_TYPES),
+                    "duration": st.column_config.NumberColumn("Minutes", min_value=1, step=1),
+                    "intensity": st.column_config.SelectboxColumn("Intensity", options=["Low", "Medium", "High"]),
+                    "date": st.column_config.DateColumn("Date", max_value=datetime.date.today()),
+                    "notes": st.column_config.TextColumn("Notes"),
+                },
+                key="workout_batch_rows",
+            )
+            
+            if st.form_submit_button("Log Workouts"):
+                # Untouched rows are skipped; empty cells come back as NaN. Each record
+                # keeps its row number in the editor, so errors point at the right row.
+                rows = rows.astype(object).where(rows.notna(), None)
+                numbered = [(number, record) for number, record in enumerate(rows.to_dict("records"), start=1)
+                            if any(record[field] not in (None, "") for field in ("sport", "type", "duration"))]
+                try:
+                    workouts = log_workouts(current_user, [record for number, record in numbered])
+                except BatchError as e:
+                    st.error("Nothing was logged:\n" + "\n".join(f"- Row {numbered[row - 1][0]}: {message}"
+                                                                   for row, message in e.errors))
+                else:
+                    if workouts:
+                        minutes = sum(workout["duration"] for workout in workouts)
+                        st.session_state.workout_logged_message = f"✅ Logged {len(workouts)} workouts, {minutes} minutes in total!"
+                        st.rerun(scope="app")
+                    st.warning("Fill in at least one row.")
+        
+        # GPS / heart-rate recordings: duration, distance and intensity come from the samples
+        st.subheader("Import Session Files")
+        with st.form("session_import_form", clear_on_submit=True):
+            files = st.file_uploader("GPX, TCX or CSV recordings", type=list(SESSION_FILE_TYPES),
+                                     accept_multiple_files=True)
+            sport = st.selectbox("Sport, when the file doesn't say", WORKOUT_SPORTS)
+            
+            if st.form_submit_button("Import Sessions"):
+                if not files:
+                    st.warning("Choose at least one file.")
+                else:
+                    workouts, problems = import_sessions(current_user, files, sport)
+                    for name, message in problems:
+                        st.error(f"{name}: {message}")
+                    if workouts:
+                        st.session_state.workout_logged_message = f"✅ Imported {len(workouts)} sessions!"
+                        st.rerun(scope="app")
+
+# Diet Plans Tab
+@region_fragment
+def render_diet_tab(current_user, sport):
+    with timed_region("diet"):
         st.header("🥗 Personalized Diet Plans")
         
         goal = st.selectbox("Select Your Goal", ["Weight Loss", "Muscle Gain", "Endurance", "General Health"])
         
-        if st.button("Get Diet Plan", type="primary"):
+        # Memoized per (body, sport, level, goal, load) inside the engine, so reruns don't recompute
+        profile = st.session_state.user_profiles[current_user]
+        # No logged training: the level's typical load; a rest period keeps its real 0
+        chronic_load = get_training_load(current_user)["chronic"] if st.session_state.workouts.get(current_user) else None
+        targets = nutrition_targets(profile, goal, chronic_load)
+        st.subheader("Daily Targets")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Calories", f"{targets['calories']} kcal",
+                      help=f"Maintenance {targets['maintenance']} kcal, ~{targets['training_calories']} kcal from training")
+        with col2:
+            st.metric("Protein", f"{targets['protein_g']} g")
+        with col3:
+            st.metric("Carbs", f"{targets['carbs_g']} g")
+        with col4:
+            st.metric("Fat", f"{targets['fat_g']} g")
+        if targets["assumed_body"]:
+            st.caption(f"Assuming {DEFAULT_WEIGHT_KG:.0f} kg, {DEFAULT_HEIGHT_CM:.0f} cm, age {DEFAULT_AGE} "
+                       f"where your profile has no weight or measurements.")
+        
+        if st.button("Get Diet Plan", type="primary", key="diet_plan"):
             goal_key = goal.lower().replace(" ", "_")
             
             # General diet advice
@@ -514,19 +1128,22 @@ def main():
                     st.markdown("**General Guidelines**")
                     st.write(sport_diet.get('general', 'Balanced nutrition'))
             
-            # Sample meal plan
+            # Day plan fitted to the targets above, from the bundled food table
             st.subheader("Sample Daily Meal Plan")
-            meal_plan = {
-                "Breakfast": "Oatmeal with berries and nuts, Greek yogurt",
-                "Mid-Morning": "Banana with almond butter",
-                "Lunch": "Grilled chicken salad with quinoa",
-                "Afternoon": "Protein smoothie with spinach",
-                "Dinner": "Salmon with sweet potato and vegetables",
-                "Evening": "Casein protein or cottage cheese"
-            }
+            plan = meal_plan(targets)
+            sport_diet = SPORTS_KNOWLEDGE.get(sport, {}).get('diet')
+            
+            for meal in plan["meals"]:
+                totals = meal["totals"]
+                st.write(f"**{meal['meal']}:** {', '.join(meal['items'])} "
+                         f"({totals['kcal']} kcal, {totals['protein']}g P / {totals['carbs']}g C / {totals['fat']}g F)")
+                note = timing_note(meal["timing"], sport_diet)
+                if note:
+                    st.caption(f"{'Pre' if meal['timing'] == 'pre' else 'Post'}-activity: {note}")
             
-            for meal, food in meal_plan.items():
-                st.write(f"**{meal}:** {food}")
+            totals = plan["totals"]
+            st.caption(f"Plan total: {totals['kcal']} kcal, {totals['protein']}g protein, "
+                       f"{totals['carbs']}g carbs, {totals['fat']}g fat")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,176 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_IO_WORKERS = 4
+
+# How long close() lets queued file operations finish, and how often it checks
+CLOSE_TIMEOUT = 10
+CLOSE_POLL_MS = 50
+
+
+def write_text_file(path, text):
+    # Write to a temporary file and swap it in, so a crash never leaves half a file
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temporary, path)
+
+
+def append_text_file(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# One asyncio loop on a background thread, bridged to Tk. The Tk thread hands
+# work over with submit()/run() and gets results back through root.after, so
+# widgets are only ever touched on the Tk thread. Blocking calls (requests,
+# the language model) run on an I/O pool; file operations run one at a time,
+# in order, on a disk lane. Work submitted under a key supersedes (cancels)
+# the unfinished task with the same key, so its callbacks never fire.
+# Work may also be handed over from the I/O threads (e.g. a store saving
+# itself after a fetch); only the callbacks are tied to the Tk thread.
+class TkAsyncBridge:
+    def __init__(self, root, io_workers=DEFAULT_IO_WORKERS):
+        self.root = root
+        self.loop = asyncio.new_event_loop()
+        self._io = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="sportspal-io")
+        self._disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sportspal-disk")
+        # key -> future of the current task for that key
+        self._tasks = {}
+        self._tasks_lock = threading.Lock()
+        # Set by close(): results are no longer delivered, and once the loop
+        # is shutting down no new work is accepted
+        self.closing = False
+        self._stopping = False
+        # Unfinished network / model tasks, cancelled on close (file operations are not)
+        self._io_futures = set()
+        self._thread = threading.Thread(target=self._run_loop, name="sportspal-asyncio", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine_function, *args, key=None, on_done=None, on_error=None):
+        # Schedules coroutine_function(*args) on the loop; callbacks run on the Tk thread
+        if self._stopping:
+            raise RuntimeError("The async bridge is closed")
+        future = asyncio.run_coroutine_threadsafe(coroutine_function(*args), self.loop)
+        if key is not None:
+            with self._tasks_lock:
+                previous = self._tasks.get(key)
+                self._tasks[key] = future
+            if previous is not None:
+                previous.cancel()
+        future.add_done_callback(functools.partial(self._deliver, key, on_done, on_error))
+        return future
+
+    def run(self, fn, *args, key=None, on_done=None, on_error=None, disk=False):
+        # Runs a blocking fn(*args) as a cancellable task on the I/O pool, or on the disk lane
+        executor = self._disk if disk else self._io
+
+        async def call():
+            return await self.loop.run_in_executor(executor, functools.partial(fn, *args))
+
+        future = self.submit(call, key=key, on_done=on_done, on_error=on_error)
+        if not disk:
+            self._io_futures.add(future)
+            future.add_done_callback(self._io_futures.discard)
+        return future
+
+    def cancel(self, key):
+        with self._tasks_lock:
+            future = self._tasks.pop(key, None)
+        if future is not None:
+            future.cancel()
+        return future is not None
+
+    def write_file(self, path, text):
+        # Latest content wins: a queued write to the same path is cancelled
+        self.run(write_text_file, path, text, key=("write", path), disk=True)
+
+    def append_file(self, path, text):
+        self.run(append_text_file, path, text, disk=True)
+
+    def remove_file(self, path):
+        self.cancel(("write", path))
+        self.run(remove_file, path, disk=True)
+
+    def _deliver(self, key, on_done, on_error, future):
+        # Loop thread: hop over to the Tk thread, unless the app is closing and
+        # the Tk thread may be tearing down
+        if future.cancelled() or self.closing:
+            return
+        try:
+            self.root.after(0, self._finish, key, on_done, on_error, future)
+        except Exception:
+            # Tk has been destroyed
+            pass
+
+    def _finish(self, key, on_done, on_error, future):
+        if self.closing:
+            return
+        if key is not None:
+            with self._tasks_lock:
+                if self._tasks.get(key) is not future:
+                    # Superseded after it had already finished
+                    return
+                del self._tasks[key]
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+            else:
+                print("Background task failed:\n" + "".join(traceback.format_exception(type(error), error, error.__traceback__)))
+        elif on_done:
+            on_done(future.result())
+
+    async def _drain(self, deadline):
+        # Waits for every other task, including work queued while draining
+        while True:
+            pending = asyncio.all_tasks() - {asyncio.current_task()}
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                return
+            await asyncio.wait(pending, timeout=remaining)
+
+    async def _shutdown(self, deadline):
+        await self._drain(deadline)
+        self._stopping = True
+        self._io.shutdown(wait=False, cancel_futures=True)
+        self._disk.shutdown(wait=False, cancel_futures=True)
+        self.loop.stop()
+
+    def close(self, on_closed=None, timeout=CLOSE_TIMEOUT):
+        # Cancels network / model work and lets queued file operations finish on
+        # the loop, without blocking the Tk thread; on_closed runs on the Tk
+        # thread once the loop has stopped (or after `timeout` seconds)
+        if self.closing:
+            return
+        self.closing = True
+        for future in list(self._io_futures):
+            future.cancel()
+        deadline = time.monotonic() + timeout
+        asyncio.run_coroutine_threadsafe(self._shutdown(deadline), self.loop)
+        self._wait_closed(deadline, on_closed)
+
+    def _wait_closed(self, deadline, on_closed):
+        if self._thread.is_alive() and time.monotonic() < deadline:
+            self.root.after(CLOSE_POLL_MS, self._wait_closed, deadline, on_closed)
+        elif on_closed:
+            on_closed()
@@ -0,0 +1,150 @@
+"""Per-interaction server time for the Streamlit app, before and after fragments.
+
+Runs app.py headless with Streamlit's AppTest, seeds a session with chat
+history and workouts, then clicks the real controls and times each click from
+start to finish. "before" is the app with SPORTSPAL_FRAGMENTS=0, where every
+click reruns the whole script; "now" is the app as shipped, where a click
+inside a fragment reruns only that fragment, as it does in the browser:
+
+    python bench_app.py --chat-messages 500 --workouts 2000 --runs 10
+"""
+import argparse
+import dataclasses
+import datetime
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequests
+from streamlit.testing.v1 import AppTest, app_test
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from chat_log import ChatHistory
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# (label, widget key, text typed into the chat box first)
+INTERACTIONS = [
+    ("Send", "chat_send", "How should I train for tennis?"),
+    ("Clear Chat", "chat_clear", None),
+    ("Refresh News", "news_refresh", None),
+    ("Get Diet Plan", "diet_plan", None),
+    ("Log Workout", "log_workout", None),
+]
+
+
+class FragmentScriptRunner(LocalScriptRunner):
+    # AppTest reruns the whole script for every widget event. The browser sends
+    # an event from a widget inside a fragment as a rerun of that fragment only;
+    # setting `fragment_id` makes the next run do the same.
+    fragment_id = None
+    # widget id -> id of the fragment that drew it, from the last run's deltas
+    widget_fragments = {}
+
+    def run(self, *args, **kwargs):
+        if FragmentScriptRunner.fragment_id:
+            # Drop the full-app rerun queued by the constructor, or it would
+            # absorb the fragment rerun
+            self._requests = ScriptRequests()
+        return super().run(*args, **kwargs)
+
+    def request_rerun(self, rerun_data):
+        if FragmentScriptRunner.fragment_id:
+            rerun_data = dataclasses.replace(rerun_data, fragment_id=FragmentScriptRunner.fragment_id)
+        return super().request_rerun(rerun_data)
+
+    def forward_msgs(self):
+        messages = super().forward_msgs()
+        for message in messages:
+            if message.HasField("delta") and message.delta.fragment_id and message.delta.HasField("new_element"):
+                element = message.delta.new_element
+                widget_id = getattr(getattr(element, element.WhichOneof("type")), "id", "")
+                if widget_id:
+                    FragmentScriptRunner.widget_fragments[widget_id] = message.delta.fragment_id
+        return messages
+
+
+app_test.LocalScriptRunner = FragmentScriptRunner
+
+
+def make_workouts(count):
+    start = datetime.datetime.now() - datetime.timedelta(days=count)
+    return [{
+        "date": (start + datetime.timedelta(days=i)).isoformat(),
+        "sport": random.choice(["Football", "Basketball", "Tennis", "Running"]),
+        "type": random.choice(["Cardio", "Strength", "Skills"]),
+        "duration": random.randint(10, 120),
+        "intensity": random.choice(["Low", "Medium", "High"]),
+        "notes": "",
+    } for i in range(count)]
+
+
+def make_chat_history(count):
+    chat_history = ChatHistory("default")
+    chat_history.clear()
+    for i in range(count):
+        chat_history.append("user" if i % 2 == 0 else "assistant", f"Message {i} about training")
+    return chat_history
+
+
+def click(at, key, text):
+    # One interaction, timed from the click to the end of the rerun(s) it causes
+    if text is not None:
+        at.text_input(key="chat_input").set_value(text)
+    button = at.button(key=key)
+    FragmentScriptRunner.fragment_id = FragmentScriptRunner.widget_fragments.get(button.id)
+    start = time.perf_counter()
+    try:
+        button.click().run()
+    finally:
+        FragmentScriptRunner.fragment_id = None
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise SystemExit(f"App raised: {at.exception}")
+    return elapsed_ms
+
+
+def time_interactions(fragments, args):
+    # {label: [ms]} for the app with fragments on or off
+    os.environ["SPORTSPAL_FRAGMENTS"] = "1" if fragments else "0"
+    FragmentScriptRunner.widget_fragments = {}
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.session_state["chat_histories"] = {"default": make_chat_history(args.chat_messages)}
+    at.session_state["workouts"] = {"default": make_workouts(args.workouts)}
+    at.run()
+    samples = {}
+    for _ in range(args.runs):
+        for label, key, text in INTERACTIONS:
+            # Same chat size for every click (Send grows it, Clear Chat empties it)
+            at.session_state["chat_histories"] = {"default": make_chat_history(args.chat_messages)}
+            samples.setdefault(label, []).append(click(at, key, text))
+            # A fragment rerun only redraws its fragment; redraw the whole page,
+            # untimed, so the next click finds every control
+            at.run()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time SportsPal's Streamlit interactions")
+    parser.add_argument("--chat-messages", type=int, default=200)
+    parser.add_argument("--workouts", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # The app writes chat logs and stores next to it; keep them out of the working tree
+    os.chdir(tempfile.mkdtemp(prefix="sportspal-bench-"))
+    before = time_interactions(False, args)
+    now = time_interactions(True, args)
+
+    print(f"{args.chat_messages} chat messages, {args.workouts} workouts, median of {args.runs} clicks")
+    print(f"{'interaction':<16} {'before':>10} {'now':>10}")
+    for label, key, text in INTERACTIONS:
+        print(f"{label:<16} {statistics.median(before[label]):8.1f}ms {statistics.median(now[label]):8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Benchmark the news pipeline against the local NewsAPI stand-in.
+
+Starts newsapi_stub.py in-process, points both front ends at it and drives
+SportsNews.get_latest_news (main.py), fetch_news_articles (app.py) and the article
+image path, reporting p50/p95/p99 latency and throughput for each:
+
+    python bench_news.py --requests 500 --concurrency 16 --latency-ms 80 --error-rate 0.02
+"""
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from newsapi_stub import StubConfig, start_stub_server
+
+SPORTS = ["football", "basketball", "tennis", "sports", "running", "cycling"]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(name, call, requests, concurrency):
+    latencies = []
+    errors = 0
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            call(i)
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, ok in pool.map(timed, range(requests)):
+            latencies.append(elapsed * 1000.0)
+            errors += 0 if ok else 1
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    print(f"{name:<32} n={requests:<6} p50={percentile(latencies, 50):8.2f}ms "
+          f"p95={percentile(latencies, 95):8.2f}ms p99={percentile(latencies, 99):8.2f}ms "
+          f"throughput={requests / wall:9.1f}/s errors={errors}")
+
+
+def load_target(module_name):
+    # The front ends pull in heavy optional dependencies (transformers, streamlit);
+    # a missing one skips that target instead of failing the whole run
+    try:
+        return importlib.import_module(module_name)
+    except Exception as e:
+        print(f"Skipping {module_name}.py targets: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the SportsPal news pipeline")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--image-width", type=int, default=800)
+    parser.add_argument("--image-height", type=int, default=450)
+    args = parser.parse_args()
+
+    config = StubConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                        image_size=(args.image_width, args.image_height))
+    server, base_url = start_stub_server(config)
+
+    # Must be set before the front ends are imported: the URL and quota are read at import time
+    os.environ["NEWS_API_URL"] = base_url
+    os.environ.setdefault("NEWS_API_KEY", "stub")
+    os.environ["NEWS_API_DAILY_QUOTA"] = str(10 ** 9)
+
+    # Keep the benchmark's news store and search index out of the working tree
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(tempfile.mkdtemp(prefix="sportspal-bench-"))
+
+    print(f"Stub at {base_url} latency={args.latency_ms}ms error_rate={args.error_rate} "
+          f"rate_limit_rate={args.rate_limit_rate} concurrency={args.concurrency}")
+
+    tk_app = load_target("main")
+    if tk_app is not None:
+        before = config.requests
+        run("SportsNews.get_latest_news",
+            lambda i: tk_app.SportsNews.get_latest_news(SPORTS[i % len(SPORTS)], 20),
+            args.requests, args.concurrency)
+        print(f"{'':<32} upstream calls={config.requests - before}")
+
+        image_url = base_url.replace("/v2/everything", "/images/1.png")
+        run("SportsNews.get_news_image",
+            lambda i: tk_app.SportsNews.get_news_image(image_url),
+            args.requests, args.concurrency)
+
+    web_app = load_target("app")
+    if web_app is not None:
+        before = config.requests
+        # Bypass st.cache_data so every call exercises the pipeline, not the result cache
+        run("app.fetch_news_articles (uncached)",
+            lambda i: web_app.fetch_news_articles.__wrapped__(SPORTS[i % len(SPORTS)], 20, web_app.PRIORITY_USER),
+            args.requests, args.concurrency)
+        print(f"{'':<32} upstream calls={config.requests - before}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
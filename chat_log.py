@@ -0,0 +1,132 @@
+import collections
+import hashlib
+import json
+import os
+import re
+
+CHAT_LOG_DIR = 'chat_logs'
+DEFAULT_CHAT_WINDOW = 50
+READ_BLOCK_SIZE = 8192
+
+
+def chat_log_path(user, directory=CHAT_LOG_DIR):
+    # Usernames are free text; keep the file name safe and still unique per user
+    safe = re.sub(r'[^A-Za-z0-9_.-]', '_', user)[:40]
+    digest = hashlib.sha1(user.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(directory, f"{safe}-{digest}.jsonl")
+
+
+def read_lines_from_end(path, skip, count):
+    # Walk the file backwards in fixed-size blocks so paging through a long
+    # log never loads more than one page (plus a block) into memory
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return []
+    with f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        buffer = b''
+        lines = []
+        skipped = 0
+        while position > 0 and len(lines) < count:
+            step = min(READ_BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            buffer = f.read(step) + buffer
+            parts = buffer.split(b'\n')
+            # The first part may be cut mid-line unless we reached the start of the file
+            buffer = parts.pop(0) if position > 0 else b''
+            for line in reversed(parts):
+                if not line:
+                    continue
+                if skipped < skip:
+                    skipped += 1
+                elif len(lines) < count:
+                    lines.append(line)
+    lines.reverse()
+    return lines
+
+
+# Every message is appended to a per-user JSONL log; only the last `window`
+# messages are kept in memory, restored from the end of the log when the
+# history is opened. Older ones can be paged back in with load_older.
+# `files` (anything with append_file(path, text) and remove_file(path), e.g.
+# the Tk async bridge) takes the log writes off the caller's thread; without
+# it they happen inline. With load=False the log is not read on open; the
+# caller runs read_log wherever it does its I/O and hands the result to restore.
+class ChatHistory:
+    def __init__(self, user, window=DEFAULT_CHAT_WINDOW, directory=CHAT_LOG_DIR, files=None, load=True):
+        self.user = user
+        self.files = files
+        self.window = window
+        self.path = chat_log_path(user, directory)
+        self.messages = collections.deque(maxlen=window)
+        # Messages in the log, including the in-memory window
+        self.count = 0
+        if load:
+            self.restore(*self.read_log())
+
+    def read_log(self):
+        # (messages in the log, the last `window` of them)
+        count = self._count_logged()
+        tail = [json.loads(line) for line in read_lines_from_end(self.path, 0, min(count, self.window))]
+        return count, tail
+
+    def restore(self, count, tail):
+        # Puts logged messages in front of any appended since the log was read
+        recent = list(self.messages)
+        self.messages.clear()
+        self.messages.extend(tail + recent)
+        self.count += count
+
+    @property
+    def archived_count(self):
+        return self.count - len(self.messages)
+
+    def append(self, sender, content):
+        message = {"sender": sender, "content": content}
+        self.messages.append(message)
+        self.count += 1
+        self._log(message)
+        return message
+
+    def read_older(self, skip, count):
+        # `count` messages before the last `skip` ones in the log; oldest first
+        return [json.loads(line) for line in read_lines_from_end(self.path, skip, count)]
+
+    def load_older(self, page, page_size=DEFAULT_CHAT_WINDOW):
+        # page 0 is the page right before the in-memory window; oldest first
+        return self.read_older(len(self.messages) + page * page_size, page_size)
+
+    def has_older(self, pages_loaded, page_size=DEFAULT_CHAT_WINDOW):
+        return self.archived_count > pages_loaded * page_size
+
+    def clear(self):
+        self.messages.clear()
+        self.count = 0
+        if self.files is not None:
+            self.files.remove_file(self.path)
+            return
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __len__(self):
+        return self.count
+
+    def _log(self, message):
+        if self.files is not None:
+            self.files.append_file(self.path, json.dumps(message) + '\n')
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(message) + '\n')
+
+    def _count_logged(self):
+        try:
+            with open(self.path, 'rb') as f:
+                return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(65536), b''))
+        except FileNotFoundError:
+            return 0
@@ -0,0 +1,206 @@
+"""Cross-user cohort analytics over the workout store.
+
+Users are split into shards, each shard is aggregated in a worker process and
+the partial results are merged:
+
+    python cohort_analytics.py                      # user_workouts.json + user_profiles.json
+    python cohort_analytics.py --processes 8
+    python cohort_analytics.py --bench --users 100000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from quantile_sketch import KLLSketch
+from workout_trends import workout_minutes
+
+WORKOUTS_FILE = 'user_workouts.json'
+PROFILES_FILE = 'user_profiles.json'
+
+SPORTS = ["Football", "Basketball", "Tennis", "Running", "Cycling", "Swimming", "Other"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+INTENSITIES = ["Low", "Medium", "High"]
+
+
+def empty_partial():
+    return {
+        "users": 0,
+        "workouts": 0,
+        # (sport, level) -> [sum of per-user weekly minutes, users]
+        "weekly_minutes": {},
+        "intensities": {},
+        # (sport, level) -> KLLSketch of session minutes; sketches merge across shards
+        "durations": {},
+    }
+
+
+def aggregate_users(users, today):
+    # users: iterable of (level, workouts) -> partial aggregate for one shard
+    partial = empty_partial()
+    weekly_minutes = partial["weekly_minutes"]
+    intensities = partial["intensities"]
+    durations = partial["durations"]
+    today_ordinal = today.toordinal()
+    for level, workouts in users:
+        if not workouts:
+            continue
+        partial["users"] += 1
+        partial["workouts"] += len(workouts)
+        first_day = datetime.date.fromisoformat(workouts[0]["date"][:10]).toordinal()
+        weeks = max(1.0, (today_ordinal - first_day) / 7)
+
+        minutes_by_sport = {}
+        for workout in workouts:
+            sport = workout["sport"]
+            minutes = workout_minutes(workout)
+            minutes_by_sport[sport] = minutes_by_sport.get(sport, 0) + minutes
+            key = (sport, level)
+            if key not in durations:
+                durations[key] = KLLSketch()
+            durations[key].add(minutes)
+            intensity = workout.get("intensity")
+            intensities[intensity] = intensities.get(intensity, 0) + 1
+
+        for sport, minutes in minutes_by_sport.items():
+            entry = weekly_minutes.setdefault((sport, level), [0.0, 0])
+            entry[0] += minutes / weeks
+            entry[1] += 1
+    return partial
+
+
+def merge_partials(partials):
+    merged = empty_partial()
+    for partial in partials:
+        merged["users"] += partial["users"]
+        merged["workouts"] += partial["workouts"]
+        for key, (total, users) in partial["weekly_minutes"].items():
+            entry = merged["weekly_minutes"].setdefault(key, [0.0, 0])
+            entry[0] += total
+            entry[1] += users
+        for intensity, count in partial["intensities"].items():
+            merged["intensities"][intensity] = merged["intensities"].get(intensity, 0) + count
+        for key, sketch in partial["durations"].items():
+            if key not in merged["durations"]:
+                merged["durations"][key] = KLLSketch()
+            merged["durations"][key].merge(sketch)
+    return merged
+
+
+def finalize(merged):
+    total = sum(merged["intensities"].values()) or 1
+    return {
+        "users": merged["users"],
+        "workouts": merged["workouts"],
+        "avg_weekly_minutes": {
+            f"{sport}/{level}": total_minutes / users
+            for (sport, level), (total_minutes, users) in sorted(merged["weekly_minutes"].items())
+        },
+        "intensity_distribution": {
+            str(intensity): count / total for intensity, count in sorted(merged["intensities"].items(), key=str)
+        },
+        "duration_percentiles": {
+            f"{sport}/{level}": {f"p{q}": sketch.quantile(q / 100) for q in (25, 50, 75, 90)}
+            for (sport, level), sketch in sorted(merged["durations"].items())
+        },
+    }
+
+
+def shard(items, shards):
+    size = -(-len(items) // shards) if items else 0
+    return [items[i:i + size] for i in range(0, len(items), size)] if size else []
+
+
+def _aggregate_shard(args):
+    users, today = args
+    return aggregate_users(users, today)
+
+
+def cohort_report(workouts_by_user, profiles, processes=None, today=None):
+    today = today or datetime.date.today()
+    processes = processes or os.cpu_count() or 1
+    users = [
+        (profiles.get(user, {}).get("level", "beginner"), workouts)
+        for user, workouts in workouts_by_user.items()
+    ]
+    if processes == 1:
+        return finalize(aggregate_users(users, today))
+    # A few shards per worker keeps the pool busy when users have uneven histories
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        partials = pool.map(_aggregate_shard, [(chunk, today) for chunk in shard(users, processes * 4)])
+        return finalize(merge_partials(partials))
+
+
+def synthetic_users(seed, count, workouts_per_user=52, today=None):
+    rng = random.Random(seed)
+    today = today or datetime.date.today()
+    users = []
+    for _ in range(count):
+        start = today - datetime.timedelta(days=rng.randint(30, 730))
+        workouts = []
+        for i in range(rng.randint(1, workouts_per_user * 2)):
+            day = start + datetime.timedelta(days=i * 7 // 3)
+            workouts.append({
+                "date": f"{day.isoformat()}T18:00:00",
+                "sport": rng.choice(SPORTS),
+                "type": "Cardio",
+                "duration": rng.randint(15, 120),
+                "intensity": rng.choice(INTENSITIES),
+                "notes": ""
+            })
+        users.append((rng.choice(LEVELS), workouts))
+    return users
+
+
+def bench(total_users, max_processes):
+    # Times cohort_report itself, pool start-up and pickling every history to
+    # the workers included; generating the synthetic store is timed apart
+    today = datetime.date.today()
+    start = time.perf_counter()
+    workouts_by_user = {}
+    profiles = {}
+    for i, (level, workouts) in enumerate(synthetic_users(0, total_users, today=today)):
+        user = f"user{i}"
+        workouts_by_user[user] = workouts
+        profiles[user] = {"level": level}
+    print(f"generated users={total_users} in {time.perf_counter() - start:.2f}s (not included below)")
+
+    baseline = None
+    process_counts = sorted({1, 2, 4, max_processes} & set(range(1, max_processes + 1)))
+    for processes in process_counts:
+        start = time.perf_counter()
+        report = cohort_report(workouts_by_user, profiles, processes, today)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"processes={processes:<3} users={report['users']:<8} workouts={report['workouts']:<10} "
+              f"time={elapsed:7.2f}s speedup={baseline / elapsed:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SportsPal cohort analytics")
+    parser.add_argument("--workouts", default=WORKOUTS_FILE)
+    parser.add_argument("--profiles", default=PROFILES_FILE)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--bench", action="store_true", help="benchmark on synthetic users")
+    parser.add_argument("--users", type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.users, args.processes or os.cpu_count() or 1)
+        return
+
+    with open(args.workouts, 'r') as f:
+        workouts_by_user = json.load(f)
+    try:
+        with open(args.profiles, 'r') as f:
+            profiles = json.load(f)
+    except:
+        profiles = {}
+    print(json.dumps(cohort_report(workouts_by_user, profiles, args.processes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
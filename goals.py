@@ -0,0 +1,172 @@
+import datetime
+import re
+from functools import lru_cache
+
+from workout_trends import workout_minutes
+
+# "150 min/week", "3 tennis sessions/week", "20 workouts", "600 running minutes per month"
+GOAL_PATTERN = re.compile(
+    r"^\s*(?P<target>\d+(?:\.\d+)?)\s+(?:(?P<sport>[a-z]+)\s+)?"
+    r"(?P<unit>mins?|minutes?|sessions?|workouts?)"
+    r"(?:\s*(?:/|per|a|each)\s*(?P<period>day|week|month))?\s*$",
+    re.IGNORECASE
+)
+
+PERIODS = ("day", "week", "month", "all")
+
+
+@lru_cache(maxsize=512)
+def parse_goal(text):
+    # Structured form of a goal string, or None for free-text goals like "Get fit":
+    # {"text", "target", "metric": "minutes" | "sessions", "sport" (lowercase or None), "period"}
+    match = GOAL_PATTERN.match(str(text))
+    if not match:
+        return None
+    sport = match.group("sport")
+    return {
+        "text": text,
+        "target": float(match.group("target")),
+        "metric": "minutes" if match.group("unit").lower().startswith("min") else "sessions",
+        "sport": sport.lower() if sport else None,
+        "period": (match.group("period") or "all").lower(),
+    }
+
+
+def period_start(day, period):
+    # Ordinal of the first day of the period containing day (0 for all-time goals)
+    if period == "day":
+        return day.toordinal()
+    if period == "week":
+        return (day - datetime.timedelta(days=day.weekday())).toordinal()
+    if period == "month":
+        return day.replace(day=1).toordinal()
+    return 0
+
+
+def goal_amount(goal, workout):
+    # What one workout contributes to a goal
+    if goal["sport"] and str(workout["sport"]).lower() != goal["sport"]:
+        return 0
+    return workout_minutes(workout) if goal["metric"] == "minutes" else 1
+
+
+def goal_counters(profile):
+    # Per-goal counters live in the profile so they persist with it:
+    # progress["goals"][text] = {"period_start", "value", "periods_met"}
+    progress = profile.setdefault("progress", {})
+    return progress.setdefault("goals", {})
+
+
+def rollup_amount(goal, rollups, start, today):
+    # Current-period amount for a goal from the per-user rollups, used once
+    # when a goal is added so it starts from what was already done
+    if rollups is None:
+        return 0
+    if goal["period"] == "all":
+        buckets = [rollups.totals]
+    elif goal["period"] == "week":
+        buckets = [rollups.weekly.get(start, {})]
+    else:
+        buckets = [rollups.daily.get(day, {}) for day in range(start, today.toordinal() + 1)]
+    total = 0
+    for bucket in buckets:
+        if goal["sport"]:
+            entries = [entry for sport, entry in bucket.get("by_sport", {}).items()
+                       if str(sport).lower() == goal["sport"]]
+        else:
+            entries = [bucket] if bucket else []
+        for entry in entries:
+            total += entry["minutes"] if goal["metric"] == "minutes" else entry["count"]
+    return total
+
+
+def add_goal(profile, text, rollups=None, today=None):
+    # Adds a goal to the profile; structured goals get a counter seeded from
+    # the rollups. Returns the parsed goal (None for free-text goals).
+    text = text.strip()
+    goals = profile.setdefault("goals", [])
+    if text and text not in goals:
+        goals.append(text)
+    goal = parse_goal(text)
+    if goal is not None:
+        today = today or datetime.date.today()
+        start = period_start(today, goal["period"])
+        value = rollup_amount(goal, rollups, start, today)
+        goal_counters(profile)[text] = {
+            "period_start": start,
+            "value": value,
+            "periods_met": 1 if value >= goal["target"] else 0,
+        }
+    return goal
+
+
+def remove_goal(profile, text):
+    # Drops a goal and its counter from the profile
+    if text in profile.get("goals", []):
+        profile["goals"].remove(text)
+    goal_counters(profile).pop(text, None)
+
+
+def record_workout(profile, workout):
+    # Event handler for one logged workout: bumps workouts_completed and the
+    # counters of every structured goal it counts towards, rolling counters
+    # over when a new period has started. O(goals), no history scan.
+    progress = profile.setdefault("progress", {})
+    progress["workouts_completed"] = progress.get("workouts_completed", 0) + 1
+    day = datetime.datetime.fromisoformat(workout["date"]).date()
+    counters = goal_counters(profile)
+    for text in profile.get("goals", []):
+        goal = parse_goal(text)
+        if goal is None:
+            continue
+        amount = goal_amount(goal, workout)
+        if not amount:
+            continue
+        start = period_start(day, goal["period"])
+        counter = counters.setdefault(text, {"period_start": start, "value": 0, "periods_met": 0})
+        if start < counter["period_start"]:
+            # Backdated into an earlier period: the current counter doesn't change
+            continue
+        if start > counter["period_start"]:
+            counter["period_start"] = start
+            counter["value"] = 0
+        was_met = counter["value"] >= goal["target"]
+        counter["value"] += amount
+        if not was_met and counter["value"] >= goal["target"]:
+            counter["periods_met"] += 1
+
+
+def goal_status(profile, today=None):
+    # [{"text", "target", "value", "metric", "period", "fraction", "met", "periods_met"}]
+    # for every goal; free-text goals have target None
+    today = today or datetime.date.today()
+    counters = goal_counters(profile)
+    status = []
+    for text in profile.get("goals", []):
+        goal = parse_goal(text)
+        if goal is None:
+            status.append({"text": text, "target": None})
+            continue
+        counter = counters.get(text, {})
+        # A counter from an earlier period has expired
+        current = counter.get("period_start") == period_start(today, goal["period"])
+        value = counter.get("value", 0) if current else 0
+        status.append({
+            "text": text,
+            "target": goal["target"],
+            "value": value,
+            "metric": goal["metric"],
+            "period": goal["period"],
+            "fraction": min(1.0, value / goal["target"]) if goal["target"] else 1.0,
+            "met": value >= goal["target"],
+            "periods_met": counter.get("periods_met", 0),
+        })
+    return status
+
+
+def format_goal_status(entry):
+    if entry["target"] is None:
+        return entry["text"]
+    period = "" if entry["period"] == "all" else f" this {entry['period']}"
+    mark = "✓ " if entry["met"] else ""
+    return f"{mark}{entry['text']}: {entry['value']:g}/{entry['target']:g}{period}"
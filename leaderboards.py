@@ -0,0 +1,119 @@
+import datetime
+import threading
+from bisect import bisect_left, insort
+
+from workout_trends import workout_minutes
+
+ALL_SPORTS = "All"
+METRICS = ("minutes", "workouts")
+WINDOWS = ("week", "all")
+DEFAULT_TOP = 10
+
+# Weekly boards kept besides the current one; older weeks are dropped as time moves on
+WEEKS_KEPT = 1
+
+
+def week_start(day):
+    return day - datetime.timedelta(days=day.weekday())
+
+
+# One ranking: user -> score plus a list of (-score, user) kept sorted with
+# bisect, so a logged workout is one delete and one insert and the top k is a
+# slice, without ranking every user on each view.
+class RankedBoard:
+    def __init__(self):
+        self.scores = {}
+        self._ranked = []
+
+    def add(self, user, amount):
+        old = self.scores.get(user)
+        if old is not None:
+            del self._ranked[bisect_left(self._ranked, (-old, user))]
+        score = (old or 0) + amount
+        self.scores[user] = score
+        insort(self._ranked, (-score, user))
+
+    def top(self, k=DEFAULT_TOP):
+        return [(user, -negative) for negative, user in self._ranked[:k]]
+
+    def rank(self, user):
+        # 1-based position, or None if the user is not on the board
+        score = self.scores.get(user)
+        if score is None:
+            return None
+        return bisect_left(self._ranked, (-score, user)) + 1
+
+    def __len__(self):
+        return len(self.scores)
+
+
+# All-time and weekly boards by minutes and workout count, per sport and across
+# sports, updated as workouts are logged
+class Leaderboards:
+    def __init__(self, weeks_kept=WEEKS_KEPT):
+        self.weeks_kept = weeks_kept
+        self.all_time = {}
+        # week start ordinal -> {(metric, sport): RankedBoard}
+        self.weekly = {}
+        self._lock = threading.Lock()
+
+    def _oldest_week(self, today=None):
+        current = week_start(today or datetime.date.today())
+        return (current - datetime.timedelta(weeks=self.weeks_kept)).toordinal()
+
+    def add(self, user, workout, today=None):
+        self.add_many(user, [workout], today)
+
+    def add_many(self, user, workouts, today=None):
+        # A batch of one user's workouts is summed per board first, so each
+        # board repositions the user once however many workouts there are
+        oldest = self._oldest_week(today)
+        totals = {}
+        for workout in workouts:
+            day = datetime.datetime.fromisoformat(workout["date"]).date()
+            week = week_start(day).toordinal()
+            windows = [None] if week < oldest else [None, week]
+            for window in windows:
+                for sport in (workout["sport"], ALL_SPORTS):
+                    for metric, amount in (("minutes", workout_minutes(workout)), ("workouts", 1)):
+                        key = (window, metric, sport)
+                        totals[key] = totals.get(key, 0) + amount
+        with self._lock:
+            self._expire(today)
+            for (window, metric, sport), amount in totals.items():
+                group = self.all_time if window is None else self.weekly.setdefault(window, {})
+                if (metric, sport) not in group:
+                    group[(metric, sport)] = RankedBoard()
+                group[(metric, sport)].add(user, amount)
+
+    def _expire(self, today=None):
+        oldest = self._oldest_week(today)
+        for week in [week for week in self.weekly if week < oldest]:
+            del self.weekly[week]
+
+    def _board(self, metric, sport, window, today=None):
+        if window == "all":
+            return self.all_time.get((metric, sport))
+        self._expire(today)
+        week = week_start(today or datetime.date.today()).toordinal()
+        return self.weekly.get(week, {}).get((metric, sport))
+
+    def top(self, metric="minutes", sport=ALL_SPORTS, window="week", k=DEFAULT_TOP, today=None):
+        # [(user, score)] best first; window is "week" (the current week) or "all"
+        with self._lock:
+            board = self._board(metric, sport, window, today)
+            return board.top(k) if board else []
+
+    def rank(self, user, metric="minutes", sport=ALL_SPORTS, window="week", today=None):
+        with self._lock:
+            board = self._board(metric, sport, window, today)
+            return board.rank(user) if board else None
+
+    def size(self, metric="minutes", sport=ALL_SPORTS, window="week", today=None):
+        with self._lock:
+            board = self._board(metric, sport, window, today)
+            return len(board) if board else 0
+
+    def sports(self):
+        with self._lock:
+            return sorted({sport for _, sport in self.all_time if sport != ALL_SPORTS})
@@ -6,13 +6,34 @@ import datetime
 import requests
 from PIL import Image, ImageTk
 from io import BytesIO
-import threading
+import collections
 import os
 from dotenv import load_dotenv
 from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.dates import date2num
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
+from news_service import NewsFetchScheduler, QuotaExhausted, PRIORITY_USER, PRIORITY_BACKGROUND, newsapi_url, parse_newsapi_response
+from chat_log import ChatHistory
+from workout_trends import trend_series, workout_minutes
+from training_load import TrainingLoad
+from activity_calendar import ActivityCalendar
+from workout_rollups import WorkoutRollups, ROLLUPS_FILE, load_rollups, dump_rollups
+from quantile_sketch import DurationSketches, MIN_COHORT_SESSIONS
+from leaderboards import Leaderboards, ALL_SPORTS, DEFAULT_TOP
+from workout_recommender import WorkoutRecommender, format_recommendation
+from nutrition import nutrition_targets, format_targets
+from meal_planner import meal_plan, timing_note
+from goals import add_goal, remove_goal, record_workout, goal_status, format_goal_status
+from scheduler import JobScheduler
+from training_reminders import ReminderBoard
+from async_bridge import TkAsyncBridge, write_text_file
+from workout_batch import BatchError, BATCH_COLUMNS, validate_workouts, merge_history, parse_workout_rows
+from session_files import SESSION_FILE_TYPES, ingest_session_files, session_series
+from session_store import SessionStore
+from news_search import NewsSearchIndex
+from news_store import NewsStore
 
 # Load environment variables
 load_dotenv()
@@ -99,6 +120,28 @@ except:
         }
     }
 
+# Number of stored articles shown in the news list
+NEWS_HISTORY_SIZE = 20
+
+# Chat messages kept in the chat display; older ones are in the per-user chat log
+CHAT_WINDOW = 200
+
+# Workout history rows shown (and fetched) at a time in the Progress tab
+HISTORY_VISIBLE_ROWS = 10
+
+# Charts in an opened session window: (series, axis label)
+SESSION_CHART_LINES = [("heart_rate", "Heart rate (bpm)"), ("speed", "Speed (km/h)"), ("elevation", "Elevation (m)")]
+
+# Scheduled jobs (seconds)
+NEWS_PREFETCH_INTERVAL = 15 * 60
+NEWS_CACHE_EVICTION_INTERVAL = 60 * 60
+NEWS_CACHE_MAX_AGE = 6 * 60 * 60
+ROLLUP_COMPACTION_INTERVAL = 24 * 60 * 60
+REMINDER_CHECK_INTERVAL = 15 * 60
+
+# Daily rollup buckets older than this are folded into one per week
+ROLLUP_COMPACT_AFTER_DAYS = 365
+
 # Initialize NLP components
 class SportsNLP:
     def __init__(self):
@@ -246,27 +289,20 @@ class SportsNLP:
 
 # Sports news API integration
 class SportsNews:
+    # Shared by every caller: identical refreshes are coalesced and all calls
+    # draw from one NewsAPI quota budget
+    _index = NewsSearchIndex()
+    _store = NewsStore(index=_index)
+    # Without budget or a result in memory it serves what the store has from earlier runs
+    _scheduler = NewsFetchScheduler(stored=lambda key: SportsNews._store.articles(*key))
+    
     @staticmethod
-    def get_latest_news(sport="sports", count=5):
+    def get_latest_news(sport="sports", count=5, priority=PRIORITY_USER):
         try:
-            api_key = os.getenv('e7d208da7b5ed775ed8c5760d6f6ad5e')
-            if not api_key:
-                raise ValueError("No API key found")
-                
-            url = f"https://newsapi.org/v2/everything?q={sport}&language=en&sortBy=publishedAt&apiKey={api_key}"
-            response = requests.get(url)
-            articles = response.json().get('articles', [])[:count]
-            
-            formatted_articles = []
-            for article in articles:
-                formatted_articles.append({
-                    'title': article['title'],
-                    'description': article['description'],
-                    'url': article['url'],
-                    'image_url': article['urlToImage'],
-                    'published_at': article['publishedAt']
-                })
-            return formatted_articles
+            articles = SportsNews._scheduler.fetch((sport, count), SportsNews._fetch_news, sport, count, priority=priority)
+            if articles is None:
+                raise QuotaExhausted("News quota exhausted and nothing cached yet")
+            return articles
         except Exception as e:
             print(f"Error fetching news: {e}")
             # Fallback if API fails
@@ -279,10 +315,52 @@ class SportsNews:
                     'published_at': datetime.datetime.now().isoformat()
                 }
             ]
+    
+    @staticmethod
+    def search_news(query, sport=None, limit=NEWS_HISTORY_SIZE):
+        return SportsNews._index.search(query, sport, limit)
+    
+    @staticmethod
+    def close():
+        SportsNews._index.close()
+    
+    @staticmethod
+    def get_news_image(image_url, size=(400, 300)):
+        response = requests.get(image_url, timeout=10)
+        img = Image.open(BytesIO(response.content))
+        img.thumbnail(size)
+        return img
+    
+    @staticmethod
+    def _fetch_news(sport, count):
+        api_key = os.getenv('NEWS_API_KEY')
+        if not api_key:
+            raise ValueError("No API key found")
+        
+        # Only ask for what was published since the newest stored article
+        url = newsapi_url(sport, api_key, since=SportsNews._store.latest_published(sport))
+        response = requests.get(url, timeout=10)
+        articles = parse_newsapi_response(response)
+        
+        formatted_articles = []
+        for article in articles:
+            formatted_articles.append({
+                'title': article['title'],
+                'description': article['description'],
+                'url': article['url'],
+                'image_url': article['urlToImage'],
+                'published_at': article['publishedAt']
+            })
+        SportsNews._store.ingest(sport, formatted_articles)
+        return SportsNews._store.articles(sport, count)
 
 # Workout and progress tracking
 class WorkoutTracker:
-    def __init__(self):
+    def __init__(self, write_file=None):
+        # write_file(path, text) persists a snapshot; the Tk app hands it to the async bridge
+        self.write_file = write_file or write_text_file
+        # Per-sample data of imported session files, read only when a session is opened
+        self.sessions = SessionStore()
         self.load_user_data()
     
     def load_user_data(self):
@@ -291,64 +369,148 @@ class WorkoutTracker:
                 self.workouts = json.load(f)
         except:
             self.workouts = {}
+        self.rebuild_indexes()
+    
+    def rebuild_indexes(self):
+        # Derived per-user structures, kept current by index_workouts as workouts are logged.
+        # Rollups are persisted, so only stale ones are rebuilt from raw history.
+        self.rollups = load_rollups(self.workouts)
+        self.training_loads = {}
+        self.activity_calendars = {}
+        self.duration_sketches = DurationSketches()
+        self.leaderboards = Leaderboards()
+        self.recommender = WorkoutRecommender()
+        self.reminders = ReminderBoard()
+        for user, workouts in self.workouts.items():
+            self.index_workouts(user, workouts, update_rollups=False)
+    
+    def index_workouts(self, user, workouts, update_rollups=True):
+        if update_rollups:
+            if user not in self.rollups:
+                self.rollups[user] = WorkoutRollups()
+            for workout in workouts:
+                self.rollups[user].add(workout)
+        if user not in self.training_loads:
+            self.training_loads[user] = TrainingLoad()
+        if user not in self.activity_calendars:
+            self.activity_calendars[user] = ActivityCalendar()
+        level = USER_PROFILES.get(user, {}).get("level", "beginner")
+        for workout in workouts:
+            self.training_loads[user].add(workout)
+            self.activity_calendars[user].add(workout)
+            self.duration_sketches.add(workout["sport"], level, workout_minutes(workout))
+            self.reminders.add(user, workout)
+        # Ranked structures take the batch at once: one reposition / row rewrite per user
+        self.leaderboards.add_many(user, workouts)
+        self.recommender.add_many(user, workouts)
     
     def save_user_data(self):
-        with open('user_workouts.json', 'w') as f:
-            json.dump(self.workouts, f)
+        self.write_file('user_workouts.json', json.dumps(self.workouts))
+        self.write_file(ROLLUPS_FILE, dump_rollups(self.rollups))
     
     def log_workout(self, user, sport, workout_type, duration, intensity, notes=""):
-        if user not in self.workouts:
-            self.workouts[user] = []
-        
-        workout = {
-            "date": datetime.datetime.now().isoformat(),
+        return self.log_workouts(user, [{
             "sport": sport,
             "type": workout_type,
             "duration": duration,
             "intensity": intensity,
             "notes": notes
-        }
-        
-        self.workouts[user].append(workout)
+        }])[0]
+    
+    def log_workouts(self, user, records):
+        # Validates the whole batch first (BatchError, nothing applied, if any row
+        # is bad), then updates the indexes and writes each file once for the batch
+        workouts = validate_workouts(records)
+        if not workouts:
+            return []
+        if user not in self.workouts:
+            self.workouts[user] = []
+        merge_history(self.workouts[user], workouts)
+        self.index_workouts(user, workouts)
         self.save_user_data()
-        return workout
+        
+        # Goal counters and workouts_completed are updated per event and saved with the profile
+        if user in USER_PROFILES:
+            for workout in workouts:
+                record_workout(USER_PROFILES[user], workout)
+            self.write_file('user_profiles.json', json.dumps(USER_PROFILES))
+        return workouts
+    
+    def session_ids(self, user):
+        return {workout["session"] for workout in self.workouts.get(user, []) if workout.get("session")}
+    
+    def log_sessions(self, user, records):
+        # Logs records from ingest_session_files as one batch; if the batch is
+        # rejected, the sample files stored for it are removed again
+        try:
+            return self.log_workouts(user, records)
+        except BatchError:
+            for record in records:
+                self.sessions.remove(user, record["session"])
+            raise
     
     def get_workout_history(self, user, limit=5):
         return self.workouts.get(user, [])[-limit:]
     
-    def get_progress_stats(self, user):
-        stats = {
-            "total_workouts": 0,
-            "workouts_by_sport": {},
-            "weekly_avg": 0,
-            "total_duration": 0
+    def get_training_load(self, user):
+        if user not in self.training_loads:
+            return TrainingLoad().summary()
+        return self.training_loads[user].summary()
+    
+    def get_activity_calendar(self, user):
+        if user not in self.activity_calendars:
+            return ActivityCalendar()
+        return self.activity_calendars[user]
+    
+    def get_duration_ranks(self, user):
+        # [(sport, average minutes, share of the sport/level cohort at or below it)],
+        # for cohorts with at least MIN_COHORT_SESSIONS sessions from other users
+        level = USER_PROFILES.get(user, {}).get("level", "beginner")
+        ranks = []
+        for sport, entry in self.get_rollups(user).totals["by_sport"].items():
+            if self.duration_sketches.cohort_size(sport, level) - entry["count"] < MIN_COHORT_SESSIONS:
+                continue
+            average = entry["minutes"] / max(1, entry["count"])
+            percentile = self.duration_sketches.percentile(sport, level, average)
+            if percentile is not None:
+                ranks.append((sport, average, percentile))
+        return ranks
+    
+    def get_recommendations(self, user):
+        return self.recommender.recommend(user)
+    
+    def count_workouts(self, user):
+        return len(self.workouts.get(user, []))
+    
+    def get_workout_page(self, user, offset=0, limit=50):
+        # Newest first; only the requested slice is copied, however long the history
+        workouts = self.workouts.get(user, [])
+        total = len(workouts)
+        offset = max(0, min(offset, max(0, total - 1)))
+        end = total - offset
+        page = workouts[max(0, end - limit):end][::-1]
+        next_offset = offset + len(page)
+        return {
+            "workouts": page,
+            "offset": offset,
+            "limit": limit,
+            "total": total,
+            "next_offset": next_offset if next_offset < total else None
         }
-        
-        if user not in self.workouts:
-            return stats
-        
-        workouts = self.workouts[user]
-        stats["total_workouts"] = len(workouts)
-        
-        # Calculate by sport
-        for workout in workouts:
-            sport = workout["sport"]
-            if sport not in stats["workouts_by_sport"]:
-                stats["workouts_by_sport"][sport] = 0
-            stats["workouts_by_sport"][sport] += 1
-            
-            try:
-                stats["total_duration"] += int(workout["duration"])
-            except:
-                pass
-        
-        # Calculate weekly average
-        if workouts:
-            first_date = datetime.datetime.fromisoformat(workouts[0]["date"])
-            weeks = (datetime.datetime.now() - first_date).days / 7
-            stats["weekly_avg"] = len(workouts) / max(1, weeks)
-        
-        return stats
+    
+    def compact_rollups(self, today=None):
+        cutoff = (today or datetime.date.today()) - datetime.timedelta(days=ROLLUP_COMPACT_AFTER_DAYS)
+        removed = sum(rollups.compact(cutoff) for rollups in self.rollups.values())
+        if removed:
+            self.write_file(ROLLUPS_FILE, dump_rollups(self.rollups))
+        return removed
+    
+    def get_rollups(self, user):
+        return self.rollups.get(user) or WorkoutRollups()
+    
+    def get_progress_stats(self, user):
+        # Served from the materialized rollups rather than a scan of the history
+        return self.get_rollups(user).progress_stats()
 
 # GUI Application
 class SportsPalApp:
@@ -361,17 +523,34 @@ class SportsPalApp:
         # Initialize components
         self.nlp_engine = SportsNLP()
         self.news_fetcher = SportsNews()
-        self.workout_tracker = WorkoutTracker()
+        
+        # All network, model and disk I/O goes through one background asyncio loop
+        self.bridge = TkAsyncBridge(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        # News store and search index writes go onto the bridge's disk lane
+        SportsNews._store.io = self.bridge
+        self.workout_tracker = WorkoutTracker(write_file=self.bridge.write_file)
         
         # User management
         self.current_user = "default"
         self.current_sport = None
         self.context = None
+        # One mark per displayed message, oldest first. The display holds the
+        # newest chat_display_limit messages of the log; loading older pages raises it.
+        self.chat_marks = collections.deque()
+        self.chat_message_count = 0
+        self.chat_display_limit = CHAT_WINDOW
         
         # Create GUI
         self.create_widgets()
         
+        # Periodic jobs, driven from the Tk event loop
+        self.scheduler = JobScheduler()
+        self.scheduler_after_id = None
+        self.schedule_jobs()
+        
         # Load initial data
+        self.open_chat_history(self.current_user)
         self.load_news()
         self.update_progress_display()
         self.display_message("SportsPal", "Welcome to Advanced SportsPal! I can help with sports knowledge, workout plans, diet advice, and progress tracking.")
@@ -421,7 +600,22 @@ class SportsPalApp:
         level_combo.grid(row=2, column=1, sticky=tk.EW, padx=5)
         level_combo.bind('<<ComboboxSelected>>', lambda e: self.update_user_level())
         
+        ttk.Label(user_frame, text="Goals:").grid(row=3, column=0, sticky=tk.NW)
+        self.goals_label = ttk.Label(user_frame, text="", justify=tk.LEFT)
+        self.goals_label.grid(row=3, column=1, columnspan=2, sticky=tk.W, padx=5)
+        
+        self.goal_entry_var = tk.StringVar()
+        ttk.Entry(user_frame, textvariable=self.goal_entry_var).grid(row=4, column=1, sticky=tk.EW, padx=5)
+        ttk.Button(user_frame, text="Add Goal", command=self.add_goal).grid(row=4, column=2, padx=5)
+        
+        self.remove_goal_var = tk.StringVar()
+        self.remove_goal_combo = ttk.Combobox(user_frame, textvariable=self.remove_goal_var, state='readonly')
+        self.remove_goal_combo.grid(row=5, column=1, sticky=tk.EW, padx=5)
+        ttk.Button(user_frame, text="Remove Goal", command=self.remove_goal).grid(row=5, column=2, padx=5)
+        
         # Chat display
+        ttk.Button(left_frame, text="Load Older Messages", command=self.load_older_messages).pack(anchor=tk.W, pady=(0, 5))
+        
         self.chat_display = scrolledtext.ScrolledText(
             left_frame, wrap=tk.WORD, width=50, height=15,
             font=('Arial', 11), state='disabled'
@@ -451,6 +645,16 @@ class SportsPalApp:
         news_tab = ttk.Frame(self.notebook)
         self.notebook.add(news_tab, text="Sports News")
         
+        search_frame = ttk.Frame(news_tab)
+        search_frame.pack(fill=tk.X, pady=(5, 5))
+        
+        self.news_search_var = tk.StringVar()
+        news_search_entry = ttk.Entry(search_frame, textvariable=self.news_search_var)
+        news_search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
+        news_search_entry.bind('<Return>', lambda e: self.search_news())
+        
+        ttk.Button(search_frame, text="Search", command=self.search_news).pack(side=tk.RIGHT)
+        
         self.news_list = tk.Listbox(
             news_tab, height=10, font=('Arial', 10),
             selectbackground='#4a6984', selectforeground='#ffffff'
@@ -477,6 +681,101 @@ class SportsPalApp:
         self.progress_canvas_frame = ttk.Frame(progress_tab)
         self.progress_canvas_frame.pack(fill=tk.BOTH, expand=True)
         
+        # Stat labels, figure and canvas live as long as the app; update_progress_display
+        # only changes their contents
+        self.progress_stat_labels = {}
+        for row, (key, title) in enumerate([("total_workouts", "Total Workouts:"),
+                                            ("weekly_avg", "Weekly Average:"),
+                                            ("total_duration", "Total Duration:"),
+                                            ("load", "Acute / Chronic Load:"),
+                                            ("acwr", "Acute:Chronic Ratio:"),
+                                            ("monotony", "Monotony / Strain:"),
+                                            ("streak", "Current / Longest Streak:"),
+                                            ("duration_rank", "Session Length Rank:"),
+                                            ("suggestions", "Athletes Like You Do:"),
+                                            ("goals", "Goals:")]):
+            ttk.Label(self.progress_stats_frame, text=title, style='Bold.TLabel').grid(row=row, column=0, sticky=tk.W)
+            value_label = ttk.Label(self.progress_stats_frame, text="")
+            value_label.grid(row=row, column=1, sticky=tk.W)
+            self.progress_stat_labels[key] = value_label
+        
+        self.progress_figure = Figure(figsize=(5, 7))
+        self.progress_ax = self.progress_figure.add_subplot(311)
+        self.progress_ax.set_title("Workouts by Sport")
+        self.progress_ax.set_ylabel("Number of Workouts")
+        
+        # Minutes and training volume over the whole history, bucketed and downsampled
+        self.trend_ax = self.progress_figure.add_subplot(312)
+        self.trend_ax.set_ylabel("Minutes")
+        self.trend_ax.xaxis_date()
+        self.trend_volume_ax = self.trend_ax.twinx()
+        self.trend_volume_ax.set_ylabel("Volume")
+        self.trend_minutes_line, = self.trend_ax.plot([], [], color='tab:blue', label="Minutes")
+        self.trend_volume_line, = self.trend_volume_ax.plot([], [], color='tab:orange', label="Volume")
+        
+        # Last year of activity, one column per week
+        self.heatmap_ax = self.progress_figure.add_subplot(313)
+        self.heatmap_ax.set_title("Activity (last 365 days)")
+        self.heatmap_ax.set_yticks(range(7))
+        self.heatmap_ax.set_yticklabels(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"], fontsize=7)
+        self.heatmap_ax.set_xticks([])
+        self.heatmap_image = self.heatmap_ax.imshow(np.zeros((7, 53)), aspect='auto', cmap='Greens', vmin=0, vmax=1)
+        self.progress_figure.tight_layout()
+        self.progress_bars = None
+        self.progress_bar_sports = []
+        self.progress_canvas = FigureCanvasTkAgg(self.progress_figure, master=self.progress_canvas_frame)
+        
+        # Leaderboard, read straight from the incrementally ranked boards
+        leaderboard_frame = ttk.LabelFrame(progress_tab, text="Leaderboard", padding=5)
+        leaderboard_frame.pack(fill=tk.X, pady=5)
+        
+        leaderboard_controls = ttk.Frame(leaderboard_frame)
+        leaderboard_controls.pack(fill=tk.X)
+        self.leaderboard_window_var = tk.StringVar(value="week")
+        self.leaderboard_metric_var = tk.StringVar(value="minutes")
+        self.leaderboard_sport_var = tk.StringVar(value=ALL_SPORTS)
+        for label, var, values in (("Period:", self.leaderboard_window_var, ["week", "all"]),
+                                   ("Ranked by:", self.leaderboard_metric_var, ["minutes", "workouts"]),
+                                   ("Sport:", self.leaderboard_sport_var, [ALL_SPORTS])):
+            ttk.Label(leaderboard_controls, text=label).pack(side=tk.LEFT)
+            combobox = ttk.Combobox(leaderboard_controls, textvariable=var, values=values, width=10, state='readonly')
+            combobox.pack(side=tk.LEFT, padx=(0, 5))
+            combobox.bind('<<ComboboxSelected>>', lambda e: self.update_leaderboard())
+        self.leaderboard_sport_combo = combobox
+        
+        self.leaderboard_tree = ttk.Treeview(leaderboard_frame, columns=("rank", "user", "score"), show='headings',
+                                             height=5)
+        for column, title in (("rank", "#"), ("user", "User"), ("score", "Score")):
+            self.leaderboard_tree.heading(column, text=title)
+            self.leaderboard_tree.column(column, width=80)
+        self.leaderboard_tree.pack(fill=tk.X)
+        self.leaderboard_rank_label = ttk.Label(leaderboard_frame, text="")
+        self.leaderboard_rank_label.pack(anchor=tk.W)
+        
+        # Virtualized history: the tree only ever holds the visible rows and the
+        # scrollbar is driven by hand from the history offset and total
+        history_frame = ttk.LabelFrame(progress_tab, text="Workout History", padding=5)
+        history_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        history_columns = ("date", "sport", "type", "duration", "intensity")
+        self.history_tree = ttk.Treeview(history_frame, columns=history_columns, show='headings',
+                                         height=HISTORY_VISIBLE_ROWS)
+        for column in history_columns:
+            self.history_tree.heading(column, text=column.title())
+            self.history_tree.column(column, width=80)
+        self.history_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.history_scrollbar = ttk.Scrollbar(history_frame, orient=tk.VERTICAL, command=self.scroll_history)
+        self.history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.history_tree.bind('<MouseWheel>', lambda e: self.scroll_history('scroll', -1 if e.delta > 0 else 1, 'units'))
+        self.history_tree.bind('<Button-4>', lambda e: self.scroll_history('scroll', -1, 'units'))
+        self.history_tree.bind('<Button-5>', lambda e: self.scroll_history('scroll', 1, 'units'))
+        # Imported sessions open with their heart rate / speed / elevation charts
+        self.history_tree.bind('<Double-1>', self.open_history_session)
+        self.history_sessions = {}
+        self.history_offset = 0
+        
         # Workout logging tab
         workout_tab = ttk.Frame(self.notebook)
         self.notebook.add(workout_tab, text="Log Workout")
@@ -509,6 +808,18 @@ class SportsPalApp:
         self.workout_status_label = ttk.Label(workout_tab, text="", style='Success.TLabel')
         self.workout_status_label.grid(row=6, column=0, columnspan=2)
         
+        # Several sessions at once (a week's training, a paste from a spreadsheet),
+        # validated together and saved with one write
+        batch_frame = ttk.LabelFrame(workout_tab, text="Log Several Workouts", padding=5)
+        batch_frame.grid(row=7, column=0, columnspan=2, sticky=tk.NSEW, pady=5)
+        ttk.Label(batch_frame, text="One per line: " + ", ".join(BATCH_COLUMNS) + " (date and notes optional)").pack(anchor=tk.W)
+        self.batch_text = scrolledtext.ScrolledText(batch_frame, wrap=tk.NONE, height=6, font=('Arial', 10))
+        self.batch_text.pack(fill=tk.BOTH, expand=True)
+        batch_buttons = ttk.Frame(batch_frame)
+        batch_buttons.pack(pady=5)
+        ttk.Button(batch_buttons, text="Log Workouts", command=self.log_workout_batch).pack(side=tk.LEFT, padx=5)
+        ttk.Button(batch_buttons, text="Import Session Files...", command=self.import_session_files).pack(side=tk.LEFT, padx=5)
+        
         # Diet tab
         diet_tab = ttk.Frame(self.notebook)
         self.notebook.add(diet_tab, text="Diet Plans")
@@ -528,9 +839,60 @@ class SportsPalApp:
         
         # Configure grid weights
         workout_tab.grid_columnconfigure(1, weight=1)
+        workout_tab.grid_rowconfigure(7, weight=1)
         diet_tab.grid_columnconfigure(1, weight=1)
         diet_tab.grid_rowconfigure(2, weight=1)
     
+    def schedule_jobs(self):
+        # Cache eviction runs on the scheduler's worker pool; jobs touching tracker
+        # or widget state run inline on the Tk thread and hand any I/O to the bridge
+        self.scheduler.on_change = lambda: self.root.after_idle(self.arm_scheduler)
+        self.scheduler.every("news-prefetch", NEWS_PREFETCH_INTERVAL, self.prefetch_news, inline=True)
+        self.scheduler.every("news-cache-eviction", NEWS_CACHE_EVICTION_INTERVAL,
+                             SportsNews._scheduler.evict, NEWS_CACHE_MAX_AGE)
+        self.scheduler.every("rollup-compaction", ROLLUP_COMPACTION_INTERVAL,
+                             self.workout_tracker.compact_rollups, delay=60, inline=True)
+        self.scheduler.every("training-reminders", REMINDER_CHECK_INTERVAL, self.check_reminders,
+                             delay=5, inline=True)
+    
+    def arm_scheduler(self):
+        # One pending root.after for the earliest due job; nothing polls in between
+        if self.scheduler_after_id is not None:
+            self.root.after_cancel(self.scheduler_after_id)
+            self.scheduler_after_id = None
+        delay = self.scheduler.next_delay()
+        if delay is not None:
+            self.scheduler_after_id = self.root.after(int(delay * 1000) + 1, self.run_scheduled_jobs)
+    
+    def run_scheduled_jobs(self):
+        self.scheduler_after_id = None
+        self.scheduler.run_pending()
+        self.arm_scheduler()
+    
+    def prefetch_news(self):
+        # Background priority: only spends quota above the reserve kept for user requests
+        self.bridge.run(self.news_fetcher.get_latest_news, self.current_sport or "sports", NEWS_HISTORY_SIZE,
+                        PRIORITY_BACKGROUND, key="news-prefetch")
+    
+    def check_reminders(self):
+        message = self.workout_tracker.reminders.check().get(self.current_user)
+        if message:
+            self.display_message("SportsPal", f"⏰ {message}")
+    
+    def save_profiles(self):
+        self.bridge.write_file('user_profiles.json', json.dumps(USER_PROFILES))
+    
+    def close(self):
+        # The window goes at once; Tk is torn down after queued file writes finish
+        self.scheduler.stop()
+        self.root.withdraw()
+        self.bridge.close(on_closed=self.destroy)
+    
+    def destroy(self):
+        # Runs once the disk lane has drained, so no index write is still pending
+        self.news_fetcher.close()
+        self.root.destroy()
+    
     def switch_user(self):
         new_user = self.user_var.get().strip()
         if not new_user:
@@ -538,6 +900,7 @@ class SportsPalApp:
             return
         
         self.current_user = new_user
+        self.open_chat_history(new_user)
         if new_user not in USER_PROFILES:
             USER_PROFILES[new_user] = {
                 "sport": "general",
@@ -549,20 +912,21 @@ class SportsPalApp:
                     "measurements": {}
                 }
             }
-            with open('user_profiles.json', 'w') as f:
-                json.dump(USER_PROFILES, f)
+            self.save_profiles()
         
         self.sport_var.set(USER_PROFILES[new_user]["sport"].capitalize())
         self.level_var.set(USER_PROFILES[new_user]["level"].capitalize())
         
         self.display_message("SportsPal", f"Switched to user: {new_user}")
+        reminder = self.workout_tracker.reminders.pending_for(new_user)
+        if reminder:
+            self.display_message("SportsPal", f"⏰ {reminder}")
         self.update_progress_display()
     
     def update_user_sport(self):
         sport = self.sport_var.get().lower()
         USER_PROFILES[self.current_user]["sport"] = sport
-        with open('user_profiles.json', 'w') as f:
-            json.dump(USER_PROFILES, f)
+        self.save_profiles()
         
         self.current_sport = sport
         self.load_news()
@@ -571,11 +935,42 @@ class SportsPalApp:
     def update_user_level(self):
         level = self.level_var.get().lower()
         USER_PROFILES[self.current_user]["level"] = level
-        with open('user_profiles.json', 'w') as f:
-            json.dump(USER_PROFILES, f)
+        self.save_profiles()
         
         self.display_message("SportsPal", f"Your skill level has been set to {level}")
     
+    def add_goal(self):
+        text = self.goal_entry_var.get().strip()
+        if not text:
+            return
+        
+        goal = add_goal(USER_PROFILES[self.current_user], text,
+                        self.workout_tracker.get_rollups(self.current_user))
+        self.save_profiles()
+        
+        self.goal_entry_var.set("")
+        if goal is None:
+            self.display_message("SportsPal", f"Added goal '{text}'. Use a form like '150 min/week' or "
+                                              f"'3 tennis sessions/week' to have it tracked automatically.")
+        self.update_goal_display()
+    
+    def remove_goal(self):
+        text = self.remove_goal_var.get()
+        if not text:
+            return
+        
+        remove_goal(USER_PROFILES[self.current_user], text)
+        self.save_profiles()
+        self.update_goal_display()
+    
+    def update_goal_display(self):
+        profile = USER_PROFILES.get(self.current_user, {})
+        text = "\n".join(format_goal_status(entry) for entry in goal_status(profile)) or "-"
+        self.goals_label.config(text=text)
+        self.progress_stat_labels["goals"].config(text=text)
+        self.remove_goal_combo.config(values=list(profile.get("goals", [])))
+        self.remove_goal_var.set("")
+    
     def send_message(self):
         user_text = self.user_input.get().strip()
         if not user_text:
@@ -584,32 +979,125 @@ class SportsPalApp:
         self.display_message("You", user_text)
         self.user_input.delete(0, tk.END)
         
-        # Process in a separate thread to keep UI responsive
-        threading.Thread(target=self.process_message, args=(user_text,), daemon=True).start()
+        # The model runs off the Tk thread; the answer comes back through the bridge
+        self.bridge.run(self.process_message, user_text,
+                        on_done=lambda response: self.display_message("SportsPal", response))
     
     def process_message(self, user_text):
         # Get response
         response = self.nlp_engine.generate_response(user_text, self.context)
         
+        # Workout questions also get what athletes with a similar history do
+        if any(word in user_text.lower() for word in ('workout', 'train')):
+            suggestions = self.workout_tracker.get_recommendations(self.current_user)
+            if suggestions:
+                response += "\n\nAthletes who train like you also do:\n- " + "\n- ".join(
+                    format_recommendation(s) for s in suggestions
+                )
+        
         # Update context
         self.context = user_text
-        
-        # Display response
-        self.root.after(0, self.display_message, "SportsPal", response)
+        return response
+    
+    def open_chat_history(self, user):
+        # The display shows one user's chat, starting from the end of their log,
+        # which is read on the disk lane
+        self.chat_history = ChatHistory(user, window=CHAT_WINDOW, files=self.bridge, load=False)
+        self.chat_display.config(state='normal')
+        self.chat_display.delete('1.0', tk.END)
+        for mark in self.chat_marks:
+            self.chat_display.mark_unset(mark)
+        self.chat_marks.clear()
+        self.chat_display_limit = CHAT_WINDOW
+        self.chat_display.config(state='disabled')
+        self.bridge.run(self.chat_history.read_log, key="chat-log", disk=True, on_done=self.show_chat_log)
+    
+    def show_chat_log(self, log):
+        # Messages sent while the log was being read are already displayed below
+        count, tail = log
+        self.chat_history.restore(count, tail)
+        room = max(0, self.chat_display_limit - len(self.chat_marks))
+        self.insert_older_messages(tail[len(tail) - room:] if room else [])
+        self.chat_display.see(tk.END)
+    
+    def new_chat_mark(self, index):
+        # A mark at the start of each message lets us trim the display from the top
+        mark = f"msg{self.chat_message_count}"
+        self.chat_message_count += 1
+        self.chat_display.mark_set(mark, index)
+        self.chat_display.mark_gravity(mark, tk.LEFT)
+        return mark
     
     def display_message(self, sender, message):
+        self.chat_history.append(sender, message)
+        
         self.chat_display.config(state='normal')
+        self.chat_marks.append(self.new_chat_mark('end-1c'))
         self.chat_display.insert(tk.END, f"{sender}: {message}\n\n")
+        
+        while len(self.chat_marks) > self.chat_display_limit:
+            # The oldest message is in the chat log on disk and can be paged back in
+            self.chat_display.mark_unset(self.chat_marks.popleft())
+            self.chat_display.delete('1.0', self.chat_marks[0])
+        
         self.chat_display.config(state='disabled')
         self.chat_display.see(tk.END)
     
+    def insert_older_messages(self, older):
+        # Inserted above the displayed messages, each with its own mark so trimming stays exact
+        self.chat_display.config(state='normal')
+        for message in reversed(older):
+            if self.chat_marks:
+                # Let the current first mark move down with the inserted text
+                self.chat_display.mark_gravity(self.chat_marks[0], tk.RIGHT)
+            self.chat_display.insert('1.0', f"{message['sender']}: {message['content']}\n\n")
+            if self.chat_marks:
+                self.chat_display.mark_gravity(self.chat_marks[0], tk.LEFT)
+            self.chat_marks.appendleft(self.new_chat_mark('1.0'))
+        self.chat_display.config(state='disabled')
+    
+    def load_older_messages(self):
+        # The display is the tail of the log, so the next page starts right before it
+        displayed = len(self.chat_marks)
+        if len(self.chat_history) <= displayed:
+            return
+        
+        # Read on the disk lane, after any log writes still queued
+        self.bridge.run(self.chat_history.read_older, displayed, CHAT_WINDOW, disk=True,
+                        key="chat-older", on_done=self.show_older_messages)
+    
+    def show_older_messages(self, older):
+        # Loaded pages stay until the user switches; only newer growth trims them
+        self.chat_display_limit += len(older)
+        self.insert_older_messages(older)
+        self.chat_display.see('1.0')
+    
     def load_news(self):
-        def fetch_news():
-            sport = self.current_sport or "sports"
-            news = self.news_fetcher.get_latest_news(sport)
-            self.root.after(0, self.update_news_display, news)
+        # Keyed: switching sport (or searching) cancels a fetch still in flight
+        sport = self.current_sport or "sports"
+        self.bridge.run(self.news_fetcher.get_latest_news, sport, NEWS_HISTORY_SIZE,
+                        key="news", on_done=self.update_news_display)
+    
+    def search_news(self):
+        query = self.news_search_var.get().strip()
+        if not query:
+            # Empty search goes back to the latest headlines
+            self.load_news()
+            return
         
-        threading.Thread(target=fetch_news, daemon=True).start()
+        self.bridge.run(self.news_fetcher.search_news, query, key="news",
+                        on_done=lambda results: self.show_search_results(query, results))
+    
+    def show_search_results(self, query, results):
+        if not results:
+            results = [{
+                'title': f"No articles found for '{query}'",
+                'description': "Try a different search term.",
+                'url': "",
+                'image_url': "",
+                'published_at': datetime.datetime.now().isoformat()
+            }]
+        self.update_news_display(results)
     
     def update_news_display(self, news):
         self.news_list.delete(0, tk.END)
@@ -637,23 +1125,22 @@ class SportsPalApp:
         self.news_detail.insert(tk.END, article['description'])
         self.news_detail.config(state='disabled')
         
-        # Load image if available
+        # Load image if available; selecting another article cancels the download
+        self.show_news_image(None)
         if article['image_url']:
-            try:
-                response = requests.get(article['image_url'])
-                img_data = response.content
-                img = Image.open(BytesIO(img_data))
-                img.thumbnail((400, 300))
-                photo = ImageTk.PhotoImage(img)
-                
-                self.news_image_label.config(image=photo)
-                self.news_image_label.image = photo
-            except:
-                self.news_image_label.config(image='')
-                self.news_image_label.image = None
+            self.bridge.run(self.news_fetcher.get_news_image, article['image_url'], key="news-image",
+                            on_done=self.show_news_image, on_error=lambda error: self.show_news_image(None))
         else:
+            self.bridge.cancel("news-image")
+    
+    def show_news_image(self, img):
+        if img is None:
             self.news_image_label.config(image='')
             self.news_image_label.image = None
+            return
+        photo = ImageTk.PhotoImage(img)
+        self.news_image_label.config(image=photo)
+        self.news_image_label.image = photo
     
     def log_workout(self):
         sport = self.workout_sport_var.get()
@@ -667,60 +1154,238 @@ class SportsPalApp:
             return
         
         try:
-            duration = int(duration)
-        except:
-            self.workout_status_label.config(text="Duration must be a number", style='Error.TLabel')
+            workout = self.workout_tracker.log_workout(
+                self.current_user,
+                sport,
+                workout_type,
+                duration,
+                intensity,
+                notes
+            )
+        except BatchError as e:
+            self.workout_status_label.config(text=e.errors[0][1].capitalize(), style='Error.TLabel')
             return
         
-        workout = self.workout_tracker.log_workout(
-            self.current_user,
-            sport,
-            workout_type,
-            duration,
-            intensity,
-            notes
-        )
-        
-        self.workout_status_label.config(text=f"Workout logged: {workout_type} for {duration} mins", style='Success.TLabel')
+        self.workout_status_label.config(text=f"Workout logged: {workout_type} for {workout['duration']} mins", style='Success.TLabel')
         self.update_progress_display()
         
         # Clear form
         self.workout_notes_var.set("")
     
-    def update_progress_display(self):
-        # Clear previous widgets
-        for widget in self.progress_stats_frame.winfo_children():
-            widget.destroy()
-        
-        for widget in self.progress_canvas_frame.winfo_children():
-            widget.destroy()
+    def log_workout_batch(self):
+        rows = parse_workout_rows(self.batch_text.get("1.0", tk.END))
+        if not rows:
+            self.workout_status_label.config(text="Enter at least one workout", style='Error.TLabel')
+            return
+        try:
+            workouts = self.workout_tracker.log_workouts(self.current_user, [record for line, record in rows])
+        except BatchError as e:
+            # Reported by line in the text box, not by position among the parsed rows
+            self.workout_status_label.config(text="Nothing logged - " + "; ".join(
+                f"line {rows[row - 1][0]}: {message}" for row, message in e.errors[:3]
+            ), style='Error.TLabel')
+            return
         
+        minutes = sum(workout["duration"] for workout in workouts)
+        self.workout_status_label.config(text=f"Logged {len(workouts)} workouts, {minutes} mins in total", style='Success.TLabel')
+        self.batch_text.delete("1.0", tk.END)
+        self.update_progress_display()
+    
+    def import_session_files(self):
+        paths = filedialog.askopenfilenames(
+            title="Import Session Files",
+            filetypes=[("Session files", " ".join(f"*.{kind}" for kind in SESSION_FILE_TYPES)), ("All files", "*.*")]
+        )
+        if not paths:
+            return
+        user = self.current_user
+        self.workout_status_label.config(text=f"Reading {len(paths)} session files...", style='Success.TLabel')
+        # Parsing and storing samples happen on the disk lane, in order with the
+        # other file writes; logging happens back on the Tk thread
+        self.bridge.run(
+            ingest_session_files, list(paths), self.workout_tracker.sessions, user,
+            self.workout_sport_var.get() or None, USER_PROFILES.get(user), self.workout_tracker.session_ids(user),
+            disk=True, on_done=lambda result: self.log_imported_sessions(user, *result)
+        )
+    
+    def log_imported_sessions(self, user, records, errors):
+        problems = [f"{name}: {message}" for name, message in errors]
+        # Another import of the same file may have been logged while this one was read
+        known = self.workout_tracker.session_ids(user)
+        problems += [f"{record['notes']}: already logged" for record in records if record["session"] in known]
+        records = [record for record in records if record["session"] not in known]
+        workouts = []
+        if records:
+            try:
+                workouts = self.workout_tracker.log_sessions(user, records)
+            except BatchError as e:
+                problems += [f"{records[row - 1]['notes']}: {message}" for row, message in e.errors]
+        
+        text = f"Imported {len(workouts)} sessions"
+        if problems:
+            text += " - skipped " + "; ".join(problems[:3])
+        self.workout_status_label.config(text=text, style='Error.TLabel' if problems else 'Success.TLabel')
+        if workouts and user == self.current_user:
+            self.update_progress_display()
+    
+    def open_history_session(self, event):
+        workout = self.history_sessions.get(self.history_tree.identify_row(event.y))
+        if workout is None:
+            return
+        sessions = self.workout_tracker.sessions
+        user = self.current_user
+        # Only this session's file is read, on the bridge
+        self.bridge.run(
+            lambda: session_series(sessions.open(user, workout["session"])),
+            key="session-view", on_done=lambda series: self.show_session_window(workout, series),
+            on_error=lambda e: messagebox.showinfo("Session", "The samples for this session are not available.")
+        )
+    
+    def show_session_window(self, workout, series):
+        window = tk.Toplevel(self.root)
+        window.title(f"{workout['sport']} - {workout['date'][:16].replace('T', ' ')}")
+        details = [f"{workout['duration']} mins", f"{workout['intensity']} intensity"]
+        if workout.get("distance_km") is not None:
+            details.append(f"{workout['distance_km']} km")
+        if workout.get("avg_heart_rate") is not None:
+            details.append(f"avg {workout['avg_heart_rate']} bpm")
+        ttk.Label(window, text=", ".join(details), padding=5).pack(anchor=tk.W)
+        
+        figure = Figure(figsize=(7, 2 * max(1, len(series))), dpi=100)
+        for position, (name, label) in enumerate(
+                [(name, label) for name, label in SESSION_CHART_LINES if name in series], start=1):
+            ax = figure.add_subplot(len(series), 1, position)
+            ax.plot([x for x, _ in series[name]], [y for _, y in series[name]], linewidth=1)
+            ax.set_ylabel(label)
+            ax.grid(True, alpha=0.3)
+        if series:
+            figure.axes[-1].set_xlabel("Minutes")
+            figure.tight_layout()
+        canvas = FigureCanvasTkAgg(figure, master=window)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    
+    def update_progress_display(self):
         # Get stats
         stats = self.workout_tracker.get_progress_stats(self.current_user)
         
         # Display basic stats
-        ttk.Label(self.progress_stats_frame, text="Total Workouts:", style='Bold.TLabel').grid(row=0, column=0, sticky=tk.W)
-        ttk.Label(self.progress_stats_frame, text=str(stats["total_workouts"])).grid(row=0, column=1, sticky=tk.W)
+        self.progress_stat_labels["total_workouts"].config(text=str(stats["total_workouts"]))
+        self.progress_stat_labels["weekly_avg"].config(text=f"{stats['weekly_avg']:.1f} workouts/week")
+        self.progress_stat_labels["total_duration"].config(text=f"{stats['total_duration']} minutes")
         
-        ttk.Label(self.progress_stats_frame, text="Weekly Average:", style='Bold.TLabel').grid(row=1, column=0, sticky=tk.W)
-        ttk.Label(self.progress_stats_frame, text=f"{stats['weekly_avg']:.1f} workouts/week").grid(row=1, column=1, sticky=tk.W)
+        load = self.workout_tracker.get_training_load(self.current_user)
+        self.progress_stat_labels["load"].config(text=f"{load['acute']:.0f} / {load['chronic']:.0f} AU per day")
+        self.progress_stat_labels["acwr"].config(text=f"{load['acwr']:.2f}")
+        self.progress_stat_labels["monotony"].config(text=f"{load['monotony']:.2f} / {load['strain']:.0f} AU")
         
-        ttk.Label(self.progress_stats_frame, text="Total Duration:", style='Bold.TLabel').grid(row=2, column=0, sticky=tk.W)
-        ttk.Label(self.progress_stats_frame, text=f"{stats['total_duration']} minutes").grid(row=2, column=1, sticky=tk.W)
+        level = USER_PROFILES.get(self.current_user, {}).get("level", "beginner")
+        ranks = self.workout_tracker.get_duration_ranks(self.current_user)
+        self.progress_stat_labels["duration_rank"].config(text="\n".join(
+            f"{sport}: {average:.0f} min, longer than {percentile * 100:.0f}% of {level} players"
+            for sport, average, percentile in ranks
+        ) or "-")
         
-        # Create chart
-        if stats["workouts_by_sport"]:
-            fig, ax = plt.subplots(figsize=(5, 3))
-            sports = list(stats["workouts_by_sport"].keys())
-            counts = list(stats["workouts_by_sport"].values())
-            
-            ax.bar(sports, counts)
-            ax.set_title("Workouts by Sport")
-            ax.set_ylabel("Number of Workouts")
-            
-            canvas = FigureCanvasTkAgg(fig, master=self.progress_canvas_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.progress_stat_labels["suggestions"].config(text="\n".join(
+            format_recommendation(s) for s in self.workout_tracker.get_recommendations(self.current_user)
+        ) or "-")
+        
+        self.update_goal_display()
+        
+        calendar = self.workout_tracker.get_activity_calendar(self.current_user)
+        self.progress_stat_labels["streak"].config(text=f"{calendar.current_streak()} / {calendar.longest_streak} days")
+        
+        self.show_history_page(0)
+        self.update_leaderboard()
+        
+        canvas_widget = self.progress_canvas.get_tk_widget()
+        if not stats["workouts_by_sport"]:
+            canvas_widget.pack_forget()
+            return
+        
+        sports = list(stats["workouts_by_sport"].keys())
+        counts = list(stats["workouts_by_sport"].values())
+        
+        # Same sports as last time: just move the bar heights. Otherwise swap the
+        # bar set; numeric positions keep old sport names off the axis.
+        if sports == self.progress_bar_sports:
+            for bar, count in zip(self.progress_bars, counts):
+                bar.set_height(count)
+        else:
+            if self.progress_bars is not None:
+                self.progress_bars.remove()
+            positions = range(len(sports))
+            self.progress_bars = self.progress_ax.bar(positions, counts)
+            self.progress_ax.set_xticks(list(positions))
+            self.progress_ax.set_xticklabels(sports)
+            self.progress_ax.set_xlim(-0.5, len(sports) - 0.5)
+            self.progress_bar_sports = sports
+        self.progress_ax.set_ylim(0, max(counts) * 1.1)
+        
+        rollups = self.workout_tracker.get_rollups(self.current_user)
+        trends = trend_series(rollups.daily_rows(), weekly_rows=rollups.weekly_rows())
+        self.trend_ax.set_title(f"Training Trend (per {trends['bucket']})")
+        for line, axis, series in ((self.trend_minutes_line, self.trend_ax, trends["minutes"]),
+                                   (self.trend_volume_line, self.trend_volume_ax, trends["volume"])):
+            line.set_data([date2num(day) for day, _ in series], [value for _, value in series])
+            axis.relim()
+            axis.autoscale_view()
+        
+        matrix, _ = calendar.heatmap()
+        heatmap = np.array([[np.nan if count is None else count for count in row] for row in matrix], dtype=float)
+        self.heatmap_image.set_data(heatmap)
+        self.heatmap_image.set_clim(0, max(1, np.nanmax(heatmap)))
+        
+        self.progress_canvas.draw_idle()
+        if not canvas_widget.winfo_manager():
+            canvas_widget.pack(fill=tk.BOTH, expand=True)
+    
+    def update_leaderboard(self):
+        leaderboards = self.workout_tracker.leaderboards
+        self.leaderboard_sport_combo.config(values=[ALL_SPORTS] + leaderboards.sports())
+        window = self.leaderboard_window_var.get()
+        metric = self.leaderboard_metric_var.get()
+        sport = self.leaderboard_sport_var.get()
+        
+        self.leaderboard_tree.delete(*self.leaderboard_tree.get_children())
+        for position, (user, score) in enumerate(leaderboards.top(metric, sport, window, DEFAULT_TOP), start=1):
+            self.leaderboard_tree.insert('', tk.END, values=(position, user, score))
+        
+        rank = leaderboards.rank(self.current_user, metric, sport, window)
+        self.leaderboard_rank_label.config(
+            text=f"You are #{rank} of {leaderboards.size(metric, sport, window)}" if rank else ""
+        )
+    
+    def scroll_history(self, action, amount, unit=None):
+        total = self.workout_tracker.count_workouts(self.current_user)
+        if action == 'moveto':
+            offset = int(float(amount) * total)
+        elif unit == 'pages':
+            offset = self.history_offset + int(amount) * HISTORY_VISIBLE_ROWS
+        else:
+            offset = self.history_offset + int(amount)
+        self.show_history_page(min(offset, total - HISTORY_VISIBLE_ROWS))
+    
+    def show_history_page(self, offset):
+        page = self.workout_tracker.get_workout_page(self.current_user, offset, HISTORY_VISIBLE_ROWS)
+        self.history_offset = page["offset"]
+        
+        self.history_tree.delete(*self.history_tree.get_children())
+        self.history_sessions = {}
+        for workout in page["workouts"]:
+            date = datetime.datetime.fromisoformat(workout["date"]).strftime('%Y-%m-%d %H:%M')
+            item = self.history_tree.insert('', tk.END, values=(
+                date, workout["sport"], workout["type"], workout["duration"], workout["intensity"]
+            ))
+            if workout.get("session"):
+                self.history_sessions[item] = workout
+        
+        if page["total"]:
+            first = page["offset"] / page["total"]
+            last = (page["offset"] + len(page["workouts"])) / page["total"]
+            self.history_scrollbar.set(first, last)
+        else:
+            self.history_scrollbar.set(0, 1)
     
     def show_diet_plan(self):
         goal = self.diet_goal_var.get().lower().replace(" ", "_")
@@ -732,10 +1397,16 @@ class SportsPalApp:
             self.diet_display.config(state='disabled')
             return
         
-        diet_info = SPORTS_KNOWLEDGE['general']['diet'][goal]
+        profile = USER_PROFILES[self.current_user]
+        # No logged training: the level's typical load; a rest period keeps its real 0
+        chronic_load = None
+        if self.workout_tracker.workouts.get(self.current_user):
+            chronic_load = self.workout_tracker.get_training_load(self.current_user)["chronic"]
+        targets = nutrition_targets(profile, goal, chronic_load)
+        diet_info = format_targets(targets) + "\n\n" + SPORTS_KNOWLEDGE['general']['diet'][goal]
         
         # Get sport-specific diet if available
-        sport = USER_PROFILES[self.current_user]["sport"]
+        sport = profile["sport"]
         if sport in SPORTS_KNOWLEDGE and 'diet' in SPORTS_KNOWLEDGE[sport]:
             sport_diet = SPORTS_KNOWLEDGE[sport]['diet']
             diet_info += f"\n\nFor {sport} specifically:\n"
@@ -743,6 +1414,20 @@ class SportsPalApp:
             diet_info += f"Post-activity: {sport_diet.get('post_game', sport_diet.get('post_match', 'N/A'))}\n"
             diet_info += f"General: {sport_diet.get('general', 'N/A')}"
         
+        # Day plan fitted to the targets, from the bundled food table
+        plan = meal_plan(targets)
+        sport_diet = SPORTS_KNOWLEDGE.get(sport, {}).get('diet')
+        diet_info += "\n\nSample Daily Meal Plan:\n"
+        for meal in plan["meals"]:
+            totals = meal["totals"]
+            diet_info += f"{meal['meal']}: {', '.join(meal['items'])} ({totals['kcal']} kcal)\n"
+            note = timing_note(meal["timing"], sport_diet)
+            if note:
+                diet_info += f"    {'Pre' if meal['timing'] == 'pre' else 'Post'}-activity: {note}\n"
+        totals = plan["totals"]
+        diet_info += (f"Total: {totals['kcal']} kcal, {totals['protein']}g protein, "
+                      f"{totals['carbs']}g carbs, {totals['fat']}g fat")
+        
         self.diet_display.config(state='normal')
         self.diet_display.delete(1.0, tk.END)
         self.diet_display.insert(tk.END, diet_info)
@@ -0,0 +1,128 @@
+import csv
+import os
+from functools import lru_cache
+
+import numpy as np
+
+FOODS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'foods.csv')
+
+# (meal, food group, share of the day's targets, activity timing)
+MEALS = [
+    ("Breakfast", "breakfast", 0.25, None),
+    ("Mid-Morning", "snack", 0.10, None),
+    ("Lunch", "lunch", 0.25, None),
+    ("Afternoon", "snack", 0.10, "pre"),
+    ("Dinner", "dinner", 0.25, "post"),
+    ("Evening", "evening", 0.05, None),
+]
+
+# Serving multiples the solver may pick, and at most this many foods per meal
+SERVINGS = np.array([0.5, 1.0, 1.5, 2.0])
+MAX_ITEMS_PER_MEAL = 4
+
+# Calories count double in the fit; macros are matched relative to their targets
+NUTRIENTS = ("kcal", "protein", "carbs", "fat")
+NUTRIENT_WEIGHTS = np.array([2.0, 1.0, 1.0, 1.0])
+
+# Score multiplier for foods suited to the meal's pre/post-activity timing; it
+# only decides between candidates, a food is still added only if it improves the fit
+TIMING_PREFERENCE = 0.8
+
+
+def load_foods(path=FOODS_FILE):
+    # Precomputed food table: names, serving labels, an (n, 4) nutrient matrix
+    # and a boolean mask per food group / timing tag
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    groups = {group for row in rows for group in row["meals"].split("|")}
+    tags = {tag for row in rows for tag in row["tags"].split("|") if tag}
+    return {
+        "names": [row["name"] for row in rows],
+        "servings": [row["serving"] for row in rows],
+        "nutrients": np.array([[float(row[n]) for n in NUTRIENTS] for row in rows]),
+        "groups": {g: np.array([g in row["meals"].split("|") for row in rows]) for g in groups},
+        "tags": {t: np.array([t in row["tags"].split("|") for row in rows]) for t in tags},
+    }
+
+
+FOODS = load_foods()
+
+
+def fit_meal(target, allowed, preferred):
+    # Greedy fit: repeatedly add the (food, serving multiple) that most reduces
+    # the weighted relative error to the target, scoring every candidate at once
+    nutrients = FOODS["nutrients"]
+    scale = NUTRIENT_WEIGHTS / np.maximum(target, 1.0)
+    current = np.zeros(len(NUTRIENTS))
+    chosen = []
+    allowed = allowed.copy()
+    best_error = np.sum(((current - target) * scale) ** 2)
+    for _ in range(MAX_ITEMS_PER_MEAL):
+        if not allowed.any():
+            break
+        # (foods, servings, nutrients) totals if each candidate were added
+        totals = current + SERVINGS[None, :, None] * nutrients[:, None, :]
+        errors = np.sum(((totals - target) * scale) ** 2, axis=2)
+        scores = np.where(preferred[:, None], errors * TIMING_PREFERENCE, errors)
+        scores[~allowed] = np.inf
+        food, serving = np.unravel_index(np.argmin(scores), scores.shape)
+        if errors[food, serving] >= best_error:
+            break
+        best_error = errors[food, serving]
+        current = totals[food, serving]
+        chosen.append((int(food), float(SERVINGS[serving])))
+        allowed[food] = False
+    return chosen, current
+
+
+def describe_item(food, servings):
+    amount = FOODS["servings"][food]
+    if servings != 1.0:
+        amount = f"{servings:g} x {amount}"
+    return f"{FOODS['names'][food]} ({amount})"
+
+
+@lru_cache(maxsize=256)
+def plan_day(calories, protein, carbs, fat):
+    # Day plan for one set of daily targets. Each meal aims at its share of
+    # what the earlier meals left over, and no food repeats within the day.
+    # Cached per target tuple; callers must not mutate the result.
+    remaining = np.array([calories, protein, carbs, fat], dtype=float)
+    remaining_share = 1.0
+    unused = np.ones(len(FOODS["names"]), dtype=bool)
+    no_preference = np.zeros(len(FOODS["names"]), dtype=bool)
+    meals = []
+    day = np.zeros(len(NUTRIENTS))
+    for name, group, share, timing in MEALS:
+        target = np.maximum(remaining * share / remaining_share, 0.0)
+        preferred = FOODS["tags"].get(timing, no_preference) if timing else no_preference
+        chosen, totals = fit_meal(target, FOODS["groups"][group] & unused, preferred)
+        for food, _ in chosen:
+            unused[food] = False
+        remaining -= totals
+        remaining_share -= share
+        day += totals
+        if not chosen:
+            # Earlier meals already covered the day
+            continue
+        meals.append({
+            "meal": name,
+            "timing": timing,
+            "items": [describe_item(food, servings) for food, servings in chosen],
+            "totals": dict(zip(NUTRIENTS, np.round(totals).astype(int).tolist())),
+        })
+    return {"meals": meals, "totals": dict(zip(NUTRIENTS, np.round(day).astype(int).tolist()))}
+
+
+def meal_plan(targets):
+    # Day plan for nutrition_targets() output
+    return plan_day(targets["calories"], targets["protein_g"], targets["carbs_g"], targets["fat_g"])
+
+
+def timing_note(timing, sport_diet):
+    # Sport-specific pre/post-activity guidance for a meal, if any
+    if not timing or not sport_diet:
+        return None
+    if timing == "pre":
+        return sport_diet.get('pre_game', sport_diet.get('pre_match'))
+    return sport_diet.get('post_game', sport_diet.get('post_match'))
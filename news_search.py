@@ -0,0 +1,73 @@
+import re
+import sqlite3
+import threading
+
+NEWS_INDEX_FILE = 'news_index.db'
+
+
+# Full-text index over every article ever ingested, kept in SQLite FTS5 so it
+# survives restarts and outlives the rolling NewsStore window. NewsStore.ingest
+# feeds it the new articles of each refresh.
+class NewsSearchIndex:
+    def __init__(self, path=NEWS_INDEX_FILE):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS indexed_articles (key TEXT PRIMARY KEY)"
+            )
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+                "title, description, sport UNINDEXED, url UNINDEXED, "
+                "image_url UNINDEXED, published_at UNINDEXED)"
+            )
+
+    def add(self, sport, articles, key_func):
+        added = 0
+        with self._lock, self._conn:
+            for article in articles:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO indexed_articles (key) VALUES (?)", (key_func(article),)
+                )
+                if cursor.rowcount != 1:
+                    continue
+                self._conn.execute(
+                    "INSERT INTO articles_fts (title, description, sport, url, image_url, published_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (article.get('title') or '', article.get('description') or '', sport,
+                     article.get('url') or '', article.get('image_url') or '',
+                     article.get('published_at') or '')
+                )
+                added += 1
+        return added
+
+    def search(self, query, sport=None, limit=20):
+        match = self._match_expression(query)
+        if not match:
+            return []
+        sql = ("SELECT title, description, url, image_url, published_at FROM articles_fts "
+               "WHERE articles_fts MATCH ?")
+        params = [match]
+        if sport:
+            sql += " AND sport = ?"
+            params.append(sport)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {'title': title, 'description': description, 'url': url,
+             'image_url': image_url, 'published_at': published_at}
+            for title, description, url, image_url, published_at in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _match_expression(query):
+        # Quote every word so user input can't break FTS syntax; the trailing *
+        # makes each word a prefix match ("tenn" finds "tennis")
+        words = re.findall(r"\w+", query.lower())
+        return " AND ".join(f'"{word}"*' for word in words)
@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from urllib.parse import urlencode
+
+
+# Request coalescing: concurrent callers asking for the same key share one
+# in-flight call and all receive its result (or its exception).
+class _InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.upstream_calls += 1
+            else:
+                self.coalesced_calls += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Forget the key before waking followers so the next burst starts a fresh fetch
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+PRIORITY_USER = "user"
+PRIORITY_BACKGROUND = "background"
+
+# NewsAPI developer plan allows 100 requests per day
+DEFAULT_DAILY_QUOTA = 100
+
+
+class QuotaExhausted(Exception):
+    pass
+
+
+# Overridable so the pipeline can be pointed at a local stand-in (see newsapi_stub.py)
+NEWSAPI_EVERYTHING_URL = os.getenv('NEWS_API_URL', "https://newsapi.org/v2/everything")
+
+
+def newsapi_url(sport, api_key, since=None):
+    params = {'q': sport, 'language': 'en', 'sortBy': 'publishedAt', 'apiKey': api_key}
+    if since:
+        # Incremental refresh: only articles published at or after the newest one we hold
+        params['from'] = since
+    return f"{NEWSAPI_EVERYTHING_URL}?{urlencode(params)}"
+
+
+def parse_newsapi_response(response):
+    # NewsAPI reports quota problems either as HTTP 429 or as an error payload
+    payload = response.json()
+    if response.status_code == 429 or payload.get('code') in ('rateLimited', 'maximumResultsReached'):
+        raise QuotaExhausted(payload.get('message', 'NewsAPI quota exhausted'))
+    if payload.get('status') == 'error':
+        raise ValueError(payload.get('message', 'NewsAPI error'))
+    return payload.get('articles', [])
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_sec, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.refill_per_sec = float(refill_per_sec)
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_day(cls, quota, clock=time.monotonic):
+        return cls(quota, quota / 86400.0, clock)
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_sec)
+        self._updated = now
+
+    def tokens(self):
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def try_acquire(self, reserve=0.0):
+        # `reserve` tokens stay untouched so lower priority callers can't drain the budget
+        with self._lock:
+            self._refill()
+            if self._tokens - 1 < reserve:
+                return False
+            self._tokens -= 1
+            return True
+
+    def drain(self):
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
+
+
+# Central gate for every NewsAPI call. User-initiated fetches may spend the
+# whole budget, background prefetches only what's above the reserve. When the
+# budget is gone (or NewsAPI says so) callers get the last good result instead,
+# or, when there is none in memory (e.g. after a restart), whatever
+# stored(key) returns from persistent storage.
+class NewsFetchScheduler:
+    def __init__(self, bucket=None, background_reserve=0.25, stored=None):
+        if bucket is None:
+            quota = int(os.getenv('NEWS_API_DAILY_QUOTA', DEFAULT_DAILY_QUOTA))
+            bucket = TokenBucket.per_day(quota)
+        self.bucket = bucket
+        self.reserves = {
+            PRIORITY_USER: 0.0,
+            PRIORITY_BACKGROUND: bucket.capacity * background_reserve,
+        }
+        self.stored = stored
+        self._flight = SingleFlight()
+        self._last_good = {}
+        self._stored_at = {}
+        self._lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "upstream_calls": 0,
+            "served_from_cache": 0,
+            "upstream_errors": 0,
+            "quota_exhausted": {PRIORITY_USER: 0, PRIORITY_BACKGROUND: 0},
+        }
+
+    def fetch(self, key, fn, *args, priority=PRIORITY_USER, **kwargs):
+        self._count("requests")
+        # Coalesced on the key alone: a user refresh and a background prefetch of
+        # the same news share one call, made at the priority of whoever came first
+        return self._flight.do(key, self._run, key, fn, args, kwargs, priority)
+
+    def cached(self, key):
+        with self._lock:
+            return self._last_good.get(key)
+
+    def evict(self, max_age):
+        # Drops last good results older than max_age seconds; returns how many
+        cutoff = time.monotonic() - max_age
+        with self._lock:
+            stale = [key for key, stored in self._stored_at.items() if stored < cutoff]
+            for key in stale:
+                del self._last_good[key]
+                del self._stored_at[key]
+        return len(stale)
+
+    def metrics(self):
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot["quota_exhausted"] = dict(self._metrics["quota_exhausted"])
+        snapshot["coalesced_calls"] = self._flight.coalesced_calls
+        snapshot["tokens_left"] = self.bucket.tokens()
+        return snapshot
+
+    def _run(self, key, fn, args, kwargs, priority):
+        if not self.bucket.try_acquire(self.reserves.get(priority, 0.0)):
+            with self._lock:
+                self._metrics["quota_exhausted"][priority] += 1
+            return self._fallback(key)
+
+        self._count("upstream_calls")
+        try:
+            result = fn(*args, **kwargs)
+        except QuotaExhausted:
+            # Upstream disagrees with our budget; stop calling until it refills
+            self.bucket.drain()
+            with self._lock:
+                self._metrics["quota_exhausted"][priority] += 1
+            return self._fallback(key)
+        except Exception:
+            self._count("upstream_errors")
+            fallback = self._fallback(key)
+            if fallback is None:
+                raise
+            return fallback
+
+        with self._lock:
+            self._last_good[key] = result
+            self._stored_at[key] = time.monotonic()
+        return result
+
+    def _fallback(self, key):
+        # None tells the caller there is neither budget nor cached or stored data
+        cached = self.cached(key)
+        if cached is None and self.stored is not None:
+            cached = self.stored(key) or None
+        if cached is not None:
+            self._count("served_from_cache")
+        return cached
+
+    def _count(self, name):
+        with self._lock:
+            self._metrics[name] += 1
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import threading
+
+NEWS_STORE_FILE = 'news_store.json'
+DEFAULT_MAX_ARTICLES = 200
+
+
+# Articles are identified by URL; when a source leaves it blank fall back to
+# a hash of the normalized title
+def article_key(article):
+    url = (article.get('url') or '').strip()
+    if url and url != '#':
+        return url
+    title = ' '.join((article.get('title') or '').lower().split())
+    return 'title:' + hashlib.sha1(title.encode('utf-8')).hexdigest()
+
+
+# Rolling per-sport article store. Each refresh only asks NewsAPI for articles
+# newer than the latest one we have and merges the delta in here, keeping the
+# newest `max_articles` per sport. An optional search index receives every new
+# article as it is ingested. `io` (anything with write_file(path, text) and
+# run(fn, *args, disk=True), e.g. the Tk async bridge) takes the file and index
+# writes onto its disk lane; without it they happen inline.
+class NewsStore:
+    def __init__(self, path=NEWS_STORE_FILE, max_articles=DEFAULT_MAX_ARTICLES, index=None, io=None):
+        self.path = path
+        self.max_articles = max_articles
+        self.index = index
+        self.io = io
+        self._lock = threading.Lock()
+        self._articles = {}
+        self._seen = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except:
+            data = {}
+        with self._lock:
+            self._articles = {}
+            self._seen = {}
+            for sport, articles in data.items():
+                self._replace(sport, articles)
+        for sport, articles in data.items():
+            self._index(sport, articles)
+
+    def save(self):
+        # Written under the lock and swapped in whole, so concurrent ingests
+        # can't interleave and a crash never leaves a truncated store
+        with self._lock:
+            if self.io is not None:
+                # Snapshot taken under the lock, so queued writes land in order
+                # and the latest one wins
+                self.io.write_file(self.path, json.dumps(self._articles))
+                return
+            temporary = f"{self.path}.tmp"
+            with open(temporary, 'w') as f:
+                json.dump(self._articles, f)
+            os.replace(temporary, self.path)
+
+    def latest_published(self, sport):
+        with self._lock:
+            articles = self._articles.get(sport)
+            return articles[0]['published_at'] if articles else None
+
+    def articles(self, sport, count=None):
+        with self._lock:
+            articles = self._articles.get(sport, [])
+            return list(articles if count is None else articles[:count])
+
+    def ingest(self, sport, articles):
+        # Returns only the articles that were actually new
+        with self._lock:
+            seen = self._seen.setdefault(sport, set())
+            fresh = []
+            for article in articles:
+                key = article_key(article)
+                if key in seen:
+                    continue
+                seen.add(key)
+                fresh.append(article)
+            if fresh:
+                self._replace(sport, fresh + self._articles.get(sport, []))
+        if fresh:
+            self.save()
+            self._index(sport, fresh)
+        return fresh
+
+    def _index(self, sport, articles):
+        if self.index is None:
+            return
+        if self.io is not None:
+            self.io.run(self.index.add, sport, articles, article_key, disk=True)
+        else:
+            self.index.add(sport, articles, article_key)
+
+    def _replace(self, sport, articles):
+        articles = sorted(articles, key=lambda a: a.get('published_at') or '', reverse=True)
+        articles = articles[:self.max_articles]
+        self._articles[sport] = articles
+        self._seen[sport] = {article_key(a) for a in articles}
@@ -0,0 +1,187 @@
+"""Local stand-in for NewsAPI's /v2/everything endpoint.
+
+Serves generated articles in the NewsAPI response shape, plus PNG images for
+their `urlToImage`, with configurable latency, error and rate-limit rates so
+the news pipeline can be load tested offline:
+
+    python newsapi_stub.py --port 8765 --latency-ms 80 --error-rate 0.02
+    NEWS_API_URL=http://127.0.0.1:8765/v2/everything NEWS_API_KEY=stub python main.py
+"""
+import argparse
+import datetime
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = ["final", "transfer", "record", "injury", "coach", "season", "derby", "title",
+         "comeback", "draft", "league", "cup", "star", "rookie", "playoffs", "upset"]
+
+
+def make_png(width, height, seed=0):
+    # Minimal RGB PNG built with the stdlib so the image path gets real bytes to decode
+    rng = random.Random(seed)
+    color = bytes(rng.randrange(256) for _ in range(3))
+    raw = b"".join(b"\x00" + color * width for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+class StubConfig:
+    def __init__(self, latency_ms=50.0, jitter_ms=20.0, error_rate=0.0, rate_limit_rate=0.0,
+                 articles_per_page=100, new_articles_per_minute=2.0, image_size=(800, 450)):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.articles_per_page = articles_per_page
+        self.new_articles_per_minute = new_articles_per_minute
+        self.image_size = image_size
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.requests = 0
+        self._image_cache = {}
+        self._lock = threading.Lock()
+
+    def image(self, seed):
+        with self._lock:
+            if seed not in self._image_cache:
+                self._image_cache[seed] = make_png(*self.image_size, seed=seed)
+            return self._image_cache[seed]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config = None
+
+    def do_GET(self):
+        config = self.config
+        with config._lock:
+            config.requests += 1
+        delay = max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000.0
+        time.sleep(delay)
+
+        parsed = urlparse(self.path)
+        if parsed.path == "/v2/everything":
+            self._everything(parse_qs(parsed.query))
+        elif parsed.path.startswith("/images/"):
+            self._image(parsed.path.rsplit("/", 1)[-1])
+        else:
+            self._send_json(404, {"status": "error", "code": "notFound", "message": "Unknown endpoint"})
+
+    def _everything(self, params):
+        config = self.config
+        if not params.get("apiKey"):
+            self._send_json(401, {"status": "error", "code": "apiKeyMissing",
+                                  "message": "Your API key is missing."})
+            return
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            self._send_json(429, {"status": "error", "code": "rateLimited",
+                                  "message": "You have made too many requests recently."})
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            self._send_json(500, {"status": "error", "code": "unexpectedError",
+                                  "message": "Stub injected failure."})
+            return
+
+        query = params.get("q", ["sports"])[0]
+        since = params.get("from", [None])[0]
+        articles = self._articles(query, since)
+        self._send_json(200, {"status": "ok", "totalResults": len(articles), "articles": articles})
+
+    def _articles(self, query, since):
+        # Articles arrive at a steady rate since server start, newest first, so
+        # incremental `from=` requests see a realistic trickle of new items
+        config = self.config
+        now = datetime.datetime.now(datetime.timezone.utc)
+        elapsed_minutes = (now - config.started).total_seconds() / 60.0
+        newest = int(elapsed_minutes * config.new_articles_per_minute) + config.articles_per_page
+        host = f"http://{self.headers.get('Host', 'localhost')}"
+
+        articles = []
+        for number in range(newest, max(0, newest - config.articles_per_page), -1):
+            published = config.started + datetime.timedelta(
+                minutes=(number - config.articles_per_page) / config.new_articles_per_minute)
+            published_at = published.strftime("%Y-%m-%dT%H:%M:%SZ")
+            if since and published_at < since:
+                break
+            rng = random.Random(f"{query}-{number}")
+            articles.append({
+                "source": {"id": None, "name": "SportsPal Stub"},
+                "author": "Stub Reporter",
+                "title": f"{query.title()} {' '.join(rng.choices(WORDS, k=4))} #{number}",
+                "description": " ".join(rng.choices(WORDS, k=25)),
+                "url": f"{host}/articles/{query}/{number}",
+                "urlToImage": f"{host}/images/{number % 16}.png",
+                "publishedAt": published_at,
+                "content": " ".join(rng.choices(WORDS, k=60)),
+            })
+        return articles
+
+    def _image(self, name):
+        try:
+            seed = int(name.split(".")[0])
+        except ValueError:
+            self._send_json(404, {"status": "error", "code": "notFound", "message": "Unknown image"})
+            return
+        body = self.config.image(seed)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(config=None, host="127.0.0.1", port=0):
+    # Runs in a daemon thread; port=0 picks a free port. Returns (server, base_url).
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config or StubConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v2/everything"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local NewsAPI stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--image-width", type=int, default=800)
+    parser.add_argument("--image-height", type=int, default=450)
+    args = parser.parse_args()
+
+    config = StubConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                        image_size=(args.image_width, args.image_height))
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"NewsAPI stub listening on http://{args.host}:{args.port}/v2/everything")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
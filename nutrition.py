@@ -0,0 +1,107 @@
+from functools import lru_cache
+
+# Used when the profile has no weight / measurements yet
+DEFAULT_WEIGHT_KG = 70.0
+DEFAULT_HEIGHT_CM = 175.0
+DEFAULT_AGE = 30
+
+# Everyday (non-training) activity on top of the resting rate
+NEAT_FACTOR = 1.3
+
+# Training energy per load unit (minutes x intensity factor) per kg of body weight
+KCAL_PER_LOAD_UNIT_KG = 0.06
+
+# Assumed chronic load (AU/day) for users with no logged training yet (load None);
+# a logged load of 0 (a rest month) is used as is
+LEVEL_DEFAULT_LOAD = {"beginner": 30, "intermediate": 60, "advanced": 90}
+
+# Chronic load is rounded to this many AU so the targets only change with real training changes
+LOAD_STEP = 5
+
+# goal -> (calorie adjustment, protein g/kg, share of calories from fat)
+GOALS = {
+    "weight_loss": (-0.20, 2.0, 0.25),
+    "muscle_gain": (0.10, 1.8, 0.25),
+    "endurance": (0.05, 1.4, 0.20),
+    "general_health": (0.0, 1.2, 0.30),
+}
+
+# Extra protein g/kg for contact / power sports
+SPORT_PROTEIN_BONUS = {"football": 0.2, "basketball": 0.2, "tennis": 0.1}
+
+KCAL_PER_GRAM = {"protein": 4, "carbs": 4, "fat": 9}
+
+
+def goal_key(goal):
+    key = str(goal).lower().replace(" ", "_")
+    return key if key in GOALS else "general_health"
+
+
+def profile_body(profile):
+    # (weight kg, height cm, age, assumed) from progress.weight and progress.measurements
+    progress = profile.get("progress", {})
+    measurements = progress.get("measurements") or {}
+    weight = progress.get("weight")
+    height = measurements.get("height_cm", measurements.get("height"))
+    age = measurements.get("age")
+    assumed = weight is None or height is None or age is None
+    try:
+        weight = float(weight) if weight is not None else DEFAULT_WEIGHT_KG
+        height = float(height) if height is not None else DEFAULT_HEIGHT_CM
+        age = int(age) if age is not None else DEFAULT_AGE
+    except:
+        return DEFAULT_WEIGHT_KG, DEFAULT_HEIGHT_CM, DEFAULT_AGE, True
+    return round(weight, 1), round(height), age, assumed
+
+
+@lru_cache(maxsize=1024)
+def compute_targets(weight, height, age, sport, level, goal, chronic_load):
+    # Daily calorie and macro targets for one input tuple. Cached, so the same
+    # profile / goal / load never recomputes; callers must not mutate the result.
+    # Resting rate: Mifflin-St Jeor, averaged between the sex-specific constants
+    resting = 10 * weight + 6.25 * height - 5 * age - 78
+    if chronic_load is None:
+        chronic_load = LEVEL_DEFAULT_LOAD.get(level, LEVEL_DEFAULT_LOAD["beginner"])
+    training = chronic_load * weight * KCAL_PER_LOAD_UNIT_KG
+    maintenance = resting * NEAT_FACTOR + training
+
+    adjustment, protein_per_kg, fat_share = GOALS[goal]
+    calories = maintenance * (1 + adjustment)
+    protein = weight * (protein_per_kg + SPORT_PROTEIN_BONUS.get(sport, 0.0))
+    fat = calories * fat_share / KCAL_PER_GRAM["fat"]
+    carbs = max(0.0, calories - protein * KCAL_PER_GRAM["protein"] - fat * KCAL_PER_GRAM["fat"]) / KCAL_PER_GRAM["carbs"]
+    return {
+        "calories": round(calories),
+        "maintenance": round(maintenance),
+        "training_calories": round(training),
+        "protein_g": round(protein),
+        "carbs_g": round(carbs),
+        "fat_g": round(fat),
+        "chronic_load": chronic_load,
+    }
+
+
+def nutrition_targets(profile, goal, chronic_load=None):
+    # Targets for a user profile, goal and current chronic training load (AU/day),
+    # or None when the user has no logged training
+    weight, height, age, assumed = profile_body(profile)
+    targets = compute_targets(
+        weight, height, age,
+        str(profile.get("sport", "general")).lower(),
+        str(profile.get("level", "beginner")).lower(),
+        goal_key(goal),
+        None if chronic_load is None else int(round(chronic_load / LOAD_STEP)) * LOAD_STEP
+    )
+    return dict(targets, weight=weight, assumed_body=assumed)
+
+
+def format_targets(targets):
+    lines = [
+        f"Daily target: {targets['calories']} kcal (maintenance {targets['maintenance']} kcal, "
+        f"of which ~{targets['training_calories']} kcal training)",
+        f"Protein {targets['protein_g']} g | Carbs {targets['carbs_g']} g | Fat {targets['fat_g']} g",
+    ]
+    if targets["assumed_body"]:
+        lines.append(f"(Assuming {DEFAULT_WEIGHT_KG:.0f} kg, {DEFAULT_HEIGHT_CM:.0f} cm, age {DEFAULT_AGE} "
+                     f"where your profile has no weight or measurements)")
+    return "\n".join(lines)
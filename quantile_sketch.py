@@ -0,0 +1,152 @@
+import math
+import random
+import threading
+
+DEFAULT_K = 200
+
+# Sessions from other users a cohort needs before a percentile against it is shown;
+# below this a "longer than N%" mostly compares a user with their own history
+MIN_COHORT_SESSIONS = 30
+
+
+# KLL quantile sketch (Karnin, Lang, Liberty). Items live in a stack of
+# compactors; compactor h holds items of weight 2**h. A full compactor sorts
+# itself and promotes every other item to the level above, so memory stays
+# around 3k items however many values are added. Sketches built separately
+# (other shards, other processes) merge into one with the same guarantees.
+class KLLSketch:
+    def __init__(self, k=DEFAULT_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = None
+        self.max = None
+        self.compactors = [[]]
+        self._rng = random.Random(seed)
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, height):
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil((2.0 / 3.0) ** depth * self.k)) + 1
+
+    def _grow(self):
+        self.compactors.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def add(self, value):
+        self.n += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.compactors[0].append(value)
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        for height in range(len(self.compactors)):
+            compactor = self.compactors[height]
+            if len(compactor) < self._capacity(height):
+                continue
+            if height + 1 >= len(self.compactors):
+                self._grow()
+            compactor.sort()
+            # Keep an odd leftover at this level; promote every other item from a random offset
+            keep = [compactor.pop()] if len(compactor) % 2 else []
+            offset = self._rng.randint(0, 1)
+            self.compactors[height + 1].extend(compactor[offset::2])
+            self.compactors[height] = keep
+            self._size = sum(len(c) for c in self.compactors)
+            if self._size < self._max_size:
+                break
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for height, compactor in enumerate(other.compactors):
+            self.compactors[height].extend(compactor)
+        self.n += other.n
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self._size = sum(len(c) for c in self.compactors)
+        while self._size >= self._max_size:
+            self._compress()
+        return self
+
+    def rank(self, value):
+        # Estimated fraction of added values <= value
+        if not self.n:
+            return 0.0
+        weight = sum((1 << h) * sum(1 for v in c if v <= value) for h, c in enumerate(self.compactors))
+        total = sum((1 << h) * len(c) for h, c in enumerate(self.compactors))
+        return weight / total
+
+    def quantile(self, q):
+        if not self.n:
+            return None
+        items = sorted((v, 1 << h) for h, c in enumerate(self.compactors) for v in c)
+        total = sum(weight for _, weight in items)
+        target = q * total
+        cumulative = 0
+        for value, weight in items:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return items[-1][0]
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "min": self.min, "max": self.max, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(k=data["k"])
+        sketch.n = data["n"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        sketch.compactors = [list(c) for c in data["compactors"]]
+        sketch._max_size = sum(sketch._capacity(h) for h in range(len(sketch.compactors)))
+        sketch._size = sum(len(c) for c in sketch.compactors)
+        return sketch
+
+
+def cohort_key(sport, level):
+    return (str(sport).lower(), str(level).lower())
+
+
+# Workout duration sketches per (sport, level) cohort, shared by every user and
+# updated as workouts are logged
+class DurationSketches:
+    def __init__(self, k=DEFAULT_K):
+        self.k = k
+        self.sketches = {}
+        self._lock = threading.Lock()
+
+    def add(self, sport, level, minutes):
+        if minutes <= 0:
+            return
+        key = cohort_key(sport, level)
+        with self._lock:
+            if key not in self.sketches:
+                self.sketches[key] = KLLSketch(self.k)
+            self.sketches[key].add(minutes)
+
+    def percentile(self, sport, level, minutes):
+        # Share of the cohort's sessions shorter than or equal to `minutes`, or None without data
+        with self._lock:
+            sketch = self.sketches.get(cohort_key(sport, level))
+            if sketch is None or not sketch.n:
+                return None
+            return sketch.rank(minutes)
+
+    def cohort_size(self, sport, level):
+        with self._lock:
+            sketch = self.sketches.get(cohort_key(sport, level))
+            return sketch.n if sketch else 0
+
+    def merge(self, other):
+        with self._lock:
+            for key, sketch in other.sketches.items():
+                if key not in self.sketches:
+                    self.sketches[key] = KLLSketch(self.k)
+                self.sketches[key].merge(sketch)
+        return self
@@ -0,0 +1,149 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 2
+
+
+class Job:
+    def __init__(self, name, fn, args, kwargs, interval=None, inline=False):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.interval = interval
+        self.inline = inline
+        self.cancelled = False
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+
+
+# In-process job runner: due times live in a heap, so finding the next job is
+# O(1) and scheduling O(log n); nothing polls. Due jobs run on a small thread
+# pool. The scheduler doesn't own a timer: either start() a background thread
+# that sleeps until the next due time (Streamlit), or let an event loop call
+# run_pending() and re-arm itself with next_delay() (Tk's root.after).
+class JobScheduler:
+    def __init__(self, workers=DEFAULT_WORKERS, clock=time.monotonic):
+        self.clock = clock
+        self._heap = []
+        self._jobs = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sportspal-job")
+        self._thread = None
+        self._stopped = False
+        # Called (from the scheduling thread) whenever the earliest due time may have moved
+        self.on_change = None
+
+    def every(self, name, interval, fn, *args, delay=None, inline=False, **kwargs):
+        # Runs fn every interval seconds, first after delay (default: one interval).
+        # Scheduling a name again replaces the earlier job. Inline jobs run on
+        # the thread calling run_pending() (Tk's main loop) instead of the pool,
+        # for work that touches state owned by that thread.
+        job = Job(name, fn, args, kwargs, interval, inline)
+        self._push(job, interval if delay is None else delay)
+        return job
+
+    def after(self, name, delay, fn, *args, inline=False, **kwargs):
+        job = Job(name, fn, args, kwargs, inline=inline)
+        self._push(job, delay)
+        return job
+
+    def cancel(self, name):
+        with self._condition:
+            job = self._jobs.pop(name, None)
+            if job is not None:
+                job.cancelled = True
+        return job is not None
+
+    def jobs(self):
+        with self._condition:
+            return dict(self._jobs)
+
+    def _push(self, job, delay):
+        with self._condition:
+            previous = self._jobs.get(job.name)
+            if previous is not None:
+                previous.cancelled = True
+            self._jobs[job.name] = job
+            heapq.heappush(self._heap, (self.clock() + max(0.0, delay), next(self._sequence), job))
+            self._condition.notify()
+        if self.on_change:
+            self.on_change()
+
+    def next_delay(self):
+        # Seconds until the next job is due (0 if overdue), or None if nothing is scheduled
+        with self._condition:
+            self._drop_cancelled()
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - self.clock())
+
+    def _drop_cancelled(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+
+    def run_pending(self):
+        # Submits every due job to the pool and reschedules periodic ones; returns how many ran
+        now = self.clock()
+        due = []
+        with self._condition:
+            self._drop_cancelled()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, job = heapq.heappop(self._heap)
+                if job.cancelled:
+                    continue
+                if job.interval is not None:
+                    heapq.heappush(self._heap, (now + job.interval, next(self._sequence), job))
+                else:
+                    self._jobs.pop(job.name, None)
+                # A periodic job still running from last time skips this turn
+                if not job.running:
+                    job.running = True
+                    due.append(job)
+        for job in due:
+            if job.inline:
+                self._run(job)
+            else:
+                self._pool.submit(self._run, job)
+        return len(due)
+
+    def _run(self, job):
+        try:
+            job.fn(*job.args, **job.kwargs)
+            job.runs += 1
+        except Exception:
+            job.failures += 1
+            print(f"Scheduled job {job.name} failed:\n{traceback.format_exc()}")
+        finally:
+            job.running = False
+
+    def start(self):
+        # Background thread that sleeps until the next due time; scheduling wakes it early
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name="sportspal-scheduler", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                delay = self.next_delay()
+                if delay is None or delay > 0:
+                    self._condition.wait(delay)
+                    continue
+            self.run_pending()
+
+    def stop(self, wait=False):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,340 @@
+import csv
+import datetime
+import io
+import os
+import xml.etree.ElementTree as ET
+from array import array
+
+import numpy as np
+
+from nutrition import profile_body
+from session_store import COLUMNS, session_id
+from workout_trends import lttb
+
+SESSION_FILE_TYPES = ("gpx", "tcx", "csv")
+
+# A gap between samples longer than this is a pause and doesn't count as training time
+PAUSE_SECONDS = 60
+
+# Average heart rate as a share of max heart rate: below the first bound is
+# Low, below the second Medium, anything above High
+INTENSITY_ZONES = ((0.70, "Low"), (0.80, "Medium"))
+
+EARTH_RADIUS_M = 6_371_000.0
+
+# Points per line when a session is charted, and the samples speed is averaged over
+SESSION_CHART_POINTS = 300
+SPEED_WINDOW = 10
+
+# Activity names used by devices and exporters -> our sports
+SPORT_NAMES = {
+    "running": "Running", "run": "Running", "trail_running": "Running", "walking": "Running",
+    "biking": "Cycling", "cycling": "Cycling", "ride": "Cycling", "road_biking": "Cycling",
+    "mountain_biking": "Cycling", "swimming": "Swimming", "swim": "Swimming",
+    "open_water_swimming": "Swimming", "lap_swimming": "Swimming",
+    "football": "Football", "soccer": "Football", "basketball": "Basketball", "tennis": "Tennis",
+}
+
+# CSV header names accepted for each sample column
+CSV_HEADERS = {
+    "time": ("time", "timestamp", "datetime", "seconds", "elapsed"),
+    "lat": ("lat", "latitude"),
+    "lon": ("lon", "lng", "long", "longitude"),
+    "elevation": ("ele", "elevation", "altitude", "alt"),
+    "heart_rate": ("hr", "heart_rate", "heartrate", "bpm"),
+    "distance": ("distance", "distance_m", "distancemeters"),
+}
+
+
+class SessionFileError(ValueError):
+    pass
+
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def parse_time(text):
+    # Seconds since the epoch for an ISO timestamp (UTC when it has no offset),
+    # or seconds as-is for a plain number (CSV elapsed time)
+    text = text.strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    moment = datetime.datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return moment.timestamp()
+
+
+def optional_float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_xml_points(source, point_tag, info):
+    # Streams the track points of a GPX / TCX file with iterparse. Each point is
+    # detached from its parent once read, so memory stays flat however long the
+    # file is. Sport names found on the way are put in info["sport"].
+    stack = []
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        tag = local_name(element.tag)
+        if event == "start":
+            stack.append(element)
+            if tag == "Activity" and element.get("Sport"):
+                info.setdefault("sport", element.get("Sport"))
+            continue
+        stack.pop()
+        if tag == "type" and stack and local_name(stack[-1].tag) == "trk" and element.text:
+            info.setdefault("sport", element.text)
+        if tag != point_tag:
+            continue
+        yield element
+        if stack:
+            stack[-1].remove(element)
+
+
+def iter_gpx(source, info):
+    for point in iter_xml_points(source, "trkpt", info):
+        sample = {"lat": optional_float(point.get("lat")), "lon": optional_float(point.get("lon"))}
+        for child in point.iter():
+            tag = local_name(child.tag)
+            if tag == "time":
+                sample["time"] = parse_time(child.text)
+            elif tag == "ele":
+                sample["elevation"] = optional_float(child.text)
+            elif tag in ("hr", "heartrate"):
+                sample["heart_rate"] = optional_float(child.text)
+        yield sample
+
+
+def iter_tcx(source, info):
+    for point in iter_xml_points(source, "Trackpoint", info):
+        sample = {}
+        for child in point.iter():
+            tag = local_name(child.tag)
+            if tag == "Time":
+                sample["time"] = parse_time(child.text)
+            elif tag == "LatitudeDegrees":
+                sample["lat"] = optional_float(child.text)
+            elif tag == "LongitudeDegrees":
+                sample["lon"] = optional_float(child.text)
+            elif tag == "AltitudeMeters":
+                sample["elevation"] = optional_float(child.text)
+            elif tag == "DistanceMeters":
+                sample["distance"] = optional_float(child.text)
+            elif tag == "HeartRateBpm":
+                sample["heart_rate"] = optional_float("".join(child.itertext()))
+        yield sample
+
+
+def iter_csv(source, info):
+    text = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+    try:
+        yield from iter_csv_rows(csv.DictReader(text), info)
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def iter_csv_rows(reader, info):
+    headers = {header.strip().lower(): header for header in reader.fieldnames or []}
+    fields = {column: next((headers[name] for name in names if name in headers), None)
+              for column, names in CSV_HEADERS.items()}
+    if fields["time"] is None:
+        raise SessionFileError("CSV needs a time column")
+    sport = headers.get("sport")
+    for row in reader:
+        if sport and row.get(sport):
+            info.setdefault("sport", row[sport])
+        if not row.get(fields["time"]):
+            continue
+        sample = {"time": parse_time(row[fields["time"]])}
+        for column, field in fields.items():
+            if column != "time" and field is not None:
+                sample[column] = optional_float(row.get(field))
+        yield sample
+
+
+READERS = {"gpx": iter_gpx, "tcx": iter_tcx, "csv": iter_csv}
+
+
+def read_samples(source, kind):
+    # Streams a session file into per-column arrays: ({column: float array}, info).
+    # Samples without a time are dropped; gaps in other columns are filled from
+    # the neighbouring samples and columns the file never has are left out.
+    info = {}
+    columns = {column: array('d') for column in COLUMNS}
+    seen = set()
+    for sample in READERS[kind](source, info):
+        if sample.get("time") is None:
+            continue
+        for column in COLUMNS:
+            value = sample.get(column)
+            if value is None:
+                columns[column].append(np.nan)
+            else:
+                columns[column].append(value)
+                seen.add(column)
+    if len(columns["time"]) < 2:
+        raise SessionFileError("fewer than two timed samples")
+    arrays = {}
+    for column in COLUMNS:
+        if column in seen:
+            arrays[column] = fill_gaps(np.frombuffer(columns[column], dtype=np.float64))
+    order = np.argsort(arrays["time"], kind="stable")
+    arrays = {column: values[order] for column, values in arrays.items()}
+    return arrays, info
+
+
+def fill_gaps(values):
+    # Forward fill, then back fill the leading gap
+    missing = np.isnan(values)
+    if not missing.any():
+        return values.copy()
+    index = np.where(missing, 0, np.arange(len(values)))
+    np.maximum.accumulate(index, out=index)
+    filled = values[index]
+    first = np.argmax(~missing)
+    filled[:first] = values[first]
+    return filled
+
+
+def track_distance(lat, lon):
+    # Metres along the track, haversine between consecutive points
+    lat = np.radians(lat)
+    lon = np.radians(lon)
+    a = (np.sin(np.diff(lat) / 2) ** 2
+         + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2)
+    steps = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+
+def max_heart_rate(profile):
+    # Age-predicted maximum: 220 - age
+    _, _, age, _ = profile_body(profile or {})
+    return 220 - age
+
+
+def heart_rate_intensity(average, maximum):
+    share = average / maximum
+    for bound, intensity in INTENSITY_ZONES:
+        if share < bound:
+            return intensity
+    return "High"
+
+
+def sport_name(name, default=None):
+    if not name:
+        return default
+    key = name.strip().lower().replace(" ", "_")
+    return SPORT_NAMES.get(key, default or name.strip().title())
+
+
+def summarize(columns, maximum_heart_rate):
+    # Moving time, distance and intensity from the sample columns
+    times = columns["time"]
+    steps = np.diff(times)
+    moving = float(steps[steps <= PAUSE_SECONDS].sum())
+    if "distance" in columns:
+        distance = float(columns["distance"][-1] - columns["distance"][0])
+    elif "lat" in columns and "lon" in columns:
+        distance = float(track_distance(columns["lat"], columns["lon"])[-1])
+    else:
+        distance = None
+    summary = {"moving_seconds": moving, "distance_m": distance, "average_heart_rate": None, "intensity": "Medium"}
+    if "heart_rate" in columns:
+        heart_rate = columns["heart_rate"][columns["heart_rate"] > 0]
+        if len(heart_rate):
+            summary["average_heart_rate"] = float(heart_rate.mean())
+            summary["intensity"] = heart_rate_intensity(summary["average_heart_rate"], maximum_heart_rate)
+    return summary
+
+
+def session_kind(name):
+    kind = os.path.splitext(str(name))[1].lower().lstrip(".")
+    if kind not in SESSION_FILE_TYPES:
+        raise SessionFileError(f"unsupported file type {kind or '(none)'}; use {', '.join(SESSION_FILE_TYPES)}")
+    return kind
+
+
+def read_session(source, name, sport=None, workout_type="Cardio", maximum_heart_rate=None):
+    # One session file (a path or a binary file object) -> (workout record, start, columns).
+    # The record is ready for log_workouts; columns are relative to start, for SessionStore.save.
+    kind = session_kind(name)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            columns, info = read_samples(f, kind)
+    else:
+        columns, info = read_samples(source, kind)
+    start = float(columns["time"][0])
+    columns["time"] = columns["time"] - start
+    summary = summarize(columns, maximum_heart_rate or max_heart_rate(None))
+    # Plain-number CSV times are elapsed seconds with no date; those sessions are logged as of now
+    moment = datetime.datetime.fromtimestamp(start) if start > 10 ** 8 else datetime.datetime.now()
+    record = {
+        "date": moment.isoformat(timespec="seconds"),
+        "sport": sport_name(info.get("sport"), sport) or "Other",
+        "type": workout_type,
+        "duration": max(1, round(summary["moving_seconds"] / 60)),
+        "intensity": summary["intensity"],
+        "notes": os.path.basename(str(name)),
+        "session": session_id(start, columns),
+    }
+    if summary["distance_m"] is not None:
+        record["distance_km"] = round(summary["distance_m"] / 1000, 2)
+    if summary["average_heart_rate"] is not None:
+        record["avg_heart_rate"] = round(summary["average_heart_rate"])
+    return record, start, columns
+
+
+def ingest_session_files(files, store, user, sport=None, profile=None, known=()):
+    # Reads each file (a path, or a file object with a .name such as an upload),
+    # stores its samples and returns (records, errors) where errors is
+    # [(file name, message)]. Sessions whose id is in known are skipped, so a
+    # re-sync doesn't log a session twice.
+    maximum = max_heart_rate(profile)
+    records = []
+    errors = []
+    seen = set(known)
+    for source in files:
+        name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "session")
+        try:
+            record, start, columns = read_session(source, name, sport, maximum_heart_rate=maximum)
+        except (SessionFileError, ET.ParseError, ValueError, OSError) as e:
+            errors.append((os.path.basename(str(name)), str(e)))
+            continue
+        if record["session"] in seen:
+            errors.append((os.path.basename(str(name)), "already logged"))
+            continue
+        seen.add(record["session"])
+        store.save(user, record["session"], start, columns)
+        records.append(record)
+    return records, errors
+
+
+def session_series(samples, max_points=SESSION_CHART_POINTS):
+    # Downsampled chart lines for a stored session, x in minutes from the start:
+    # {"heart_rate": [(minutes, bpm)], "speed": [(minutes, km/h)], "elevation": [(minutes, m)]}
+    minutes = samples["time"] / 60
+    lines = {}
+    if "heart_rate" in samples:
+        lines["heart_rate"] = samples["heart_rate"]
+    if "distance" in samples:
+        distance = samples["distance"]
+    elif "lat" in samples and "lon" in samples:
+        distance = track_distance(samples["lat"], samples["lon"])
+    else:
+        distance = None
+    if distance is not None and len(distance) > SPEED_WINDOW:
+        window = min(SPEED_WINDOW, len(distance) - 1)
+        seconds = samples["time"][window:] - samples["time"][:-window]
+        speed = np.divide(distance[window:] - distance[:-window], seconds,
+                          out=np.zeros(len(seconds)), where=seconds > 0) * 3.6
+        lines["speed"] = np.concatenate((np.full(window, speed[0]), speed))
+    if "elevation" in samples:
+        lines["elevation"] = samples["elevation"]
+    return {name: lttb(list(zip(minutes.tolist(), values.tolist())), max_points) for name, values in lines.items()}
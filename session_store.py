@@ -0,0 +1,147 @@
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+SESSIONS_DIR = 'sessions'
+
+# Sample columns and the fixed-point scale each is stored at:
+# time in 0.1 s from the session start, positions in 1e-7 degrees (~1 cm),
+# elevation and distance in decimetres, heart rate in whole beats per minute
+COLUMN_SCALES = {
+    "time": 10,
+    "lat": 10_000_000,
+    "lon": 10_000_000,
+    "elevation": 10,
+    "heart_rate": 1,
+    "distance": 10,
+}
+COLUMNS = tuple(COLUMN_SCALES)
+
+DELTA_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+# Opened sessions kept decoded in memory
+OPEN_SESSIONS = 8
+
+
+def session_directory(user, directory=SESSIONS_DIR):
+    # Usernames are free text; keep the directory name safe and still unique per user
+    safe = re.sub(r'[^A-Za-z0-9_.-]', '_', user)[:40]
+    digest = hashlib.sha1(user.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(directory, f"{safe}-{digest}")
+
+
+def encode_column(values, scale):
+    # (first value, deltas) as fixed-point integers; per-second samples change
+    # little from one to the next, so deltas fit the smallest integer type
+    scaled = np.round(np.asarray(values, dtype=np.float64) * scale).astype(np.int64)
+    deltas = np.diff(scaled)
+    for dtype in DELTA_TYPES:
+        limits = np.iinfo(dtype)
+        if not len(deltas) or (deltas.min() >= limits.min and deltas.max() <= limits.max):
+            return int(scaled[0]), deltas.astype(dtype)
+    return int(scaled[0]), deltas
+
+
+def session_id(start, columns):
+    # Derived from the samples themselves, so re-importing a file gives the same
+    # id and two recordings never share one, even without a date (elapsed-time CSVs)
+    digest = hashlib.sha1(repr(float(start)).encode('ascii'))
+    for name in COLUMNS:
+        if name in columns:
+            first, deltas = encode_column(columns[name], COLUMN_SCALES[name])
+            digest.update(f"{name}:{first}:{deltas.dtype.str}".encode('ascii'))
+            digest.update(deltas.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def decode_column(first, deltas, scale):
+    values = np.empty(len(deltas) + 1, dtype=np.int64)
+    values[0] = first
+    np.cumsum(deltas, dtype=np.int64, out=values[1:])
+    values[1:] += first
+    return values / scale
+
+
+# One stored session. Nothing is read until a column is asked for, and each
+# column is decoded once.
+class SessionSamples:
+    def __init__(self, path):
+        self.path = path
+        with np.load(path) as data:
+            self.start = float(data["start"])
+            self.columns = [str(name) for name in data["columns"]]
+            self._first = dict(zip(self.columns, data["first"].tolist()))
+        self._decoded = {}
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def __getitem__(self, column):
+        if column not in self._decoded:
+            with np.load(self.path) as data:
+                self._decoded[column] = decode_column(self._first[column], data[column], COLUMN_SCALES[column])
+        return self._decoded[column]
+
+    def __len__(self):
+        return len(self["time"])
+
+
+@lru_cache(maxsize=OPEN_SESSIONS)
+def open_session_file(path, modified):
+    # modified is part of the key, so a rewritten file is read again
+    return SessionSamples(path)
+
+
+# Per-sample session data, one compressed file of delta-encoded columns per
+# workout under a per-user directory. A second-by-second hour is ~3600 rows;
+# mostly one-byte deltas that compress well, so a year of daily sessions is a
+# few MB per user, and only the sessions actually opened are read.
+class SessionStore:
+    def __init__(self, directory=SESSIONS_DIR):
+        self.directory = directory
+
+    def path(self, user, session_id):
+        return os.path.join(session_directory(user, self.directory), f"{session_id}.npz")
+
+    def save(self, user, session_id, start, columns):
+        # columns: {name: float array} in COLUMNS, all the same length, time relative to start
+        path = self.path(user, session_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        names = [name for name in COLUMNS if name in columns]
+        arrays = {}
+        first = []
+        for name in names:
+            value, deltas = encode_column(columns[name], COLUMN_SCALES[name])
+            first.append(value)
+            arrays[name] = deltas
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as f:
+            np.savez_compressed(f, start=np.float64(start), columns=np.array(names),
+                                first=np.array(first, dtype=np.int64), **arrays)
+        os.replace(temporary, path)
+        return path
+
+    def open(self, user, session_id):
+        # The stored samples, or None if the session has no sample file
+        path = self.path(user, session_id)
+        try:
+            modified = os.path.getmtime(path)
+        except OSError:
+            return None
+        return open_session_file(path, modified)
+
+    def remove(self, user, session_id):
+        try:
+            os.remove(self.path(user, session_id))
+        except FileNotFoundError:
+            pass
+
+    def size(self, user):
+        # Bytes on disk for a user's sessions
+        directory = session_directory(user, self.directory)
+        if not os.path.isdir(directory):
+            return 0
+        return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
@@ -0,0 +1,106 @@
+import datetime
+
+import numpy as np
+
+from workout_trends import intensity_factor, workout_minutes
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+
+def workout_load(workout):
+    # Session load in arbitrary units: minutes x intensity factor
+    return workout_minutes(workout) * intensity_factor(workout.get("intensity"))
+
+
+def rolling_sum(values, window):
+    # Trailing window sums via one cumulative sum; days before the start count as zero
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    head = cumulative[1:window]
+    tail = cumulative[window:] - cumulative[:-window]
+    return np.concatenate((head, tail))[:len(values)]
+
+
+def load_metrics(daily):
+    # Per-day acute/chronic load, ACWR, monotony and strain for a dense daily load array
+    acute = rolling_sum(daily, ACUTE_DAYS) / ACUTE_DAYS
+    chronic = rolling_sum(daily, CHRONIC_DAYS) / CHRONIC_DAYS
+    acwr = np.divide(acute, chronic, out=np.zeros_like(acute), where=chronic > 0)
+
+    # Monotony is the weekly mean over the weekly standard deviation (Foster)
+    mean_square = rolling_sum(daily * daily, ACUTE_DAYS) / ACUTE_DAYS
+    std = np.sqrt(np.maximum(mean_square - acute * acute, 0.0))
+    monotony = np.divide(acute, std, out=np.zeros_like(acute), where=std > 1e-9)
+    strain = acute * ACUTE_DAYS * monotony
+
+    return {"acute": acute, "chronic": chronic, "acwr": acwr, "monotony": monotony, "strain": strain}
+
+
+# Dense per-day load array for one user, grown in place as workouts are logged.
+# Ten years is ~3650 floats, so every metric is a handful of vector operations.
+class TrainingLoad:
+    def __init__(self, workouts=()):
+        self.start = None
+        self._daily = np.zeros(0)
+        self._length = 0
+        for workout in workouts:
+            self.add(workout)
+
+    def add(self, workout):
+        day = datetime.datetime.fromisoformat(workout["date"]).date()
+        index = self._ensure_day(day)
+        self._daily[index] += workout_load(workout)
+
+    def daily(self, until=None):
+        # Daily loads from the first workout through `until` (default today), zero-filled
+        if self.start is None:
+            return np.zeros(0)
+        until = until or datetime.date.today()
+        days = max(self._length, (until - self.start).days + 1)
+        daily = np.zeros(days)
+        daily[:self._length] = self._daily[:self._length]
+        return daily
+
+    def series(self, until=None):
+        daily = self.daily(until)
+        metrics = load_metrics(daily)
+        metrics["daily"] = daily
+        metrics["start"] = self.start
+        return metrics
+
+    def summary(self, today=None):
+        empty = {"daily_load": 0.0, "acute": 0.0, "chronic": 0.0, "acwr": 0.0, "monotony": 0.0, "strain": 0.0}
+        if self.start is None:
+            return empty
+        today = today or datetime.date.today()
+        # Only the last chronic window matters for today's numbers
+        daily = self.daily(today)[:(today - self.start).days + 1][-CHRONIC_DAYS:]
+        if not len(daily):
+            return empty
+        metrics = load_metrics(np.concatenate((np.zeros(CHRONIC_DAYS - len(daily)), daily)))
+        return {
+            "daily_load": float(daily[-1]),
+            "acute": float(metrics["acute"][-1]),
+            "chronic": float(metrics["chronic"][-1]),
+            "acwr": float(metrics["acwr"][-1]),
+            "monotony": float(metrics["monotony"][-1]),
+            "strain": float(metrics["strain"][-1]),
+        }
+
+    def _ensure_day(self, day):
+        if self.start is None:
+            self.start = day
+        if day < self.start:
+            # Backdated workout: shift everything right
+            shift = (self.start - day).days
+            self._daily = np.concatenate((np.zeros(shift), self._daily[:self._length]))
+            self._length += shift
+            self.start = day
+        index = (day - self.start).days
+        if index >= len(self._daily):
+            # Amortized growth, like a list
+            grown = np.zeros(max(index + 1, 2 * len(self._daily), 64))
+            grown[:self._length] = self._daily[:self._length]
+            self._daily = grown
+        self._length = max(self._length, index + 1)
+        return index
@@ -0,0 +1,93 @@
+import datetime
+import threading
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# A weekday is a usual training day once it was active in at least this share
+# of the weeks seen, over at least this many weeks
+USUAL_DAY_SHARE = 0.5
+MIN_WEEKS = 2
+
+
+# When a user usually trains: distinct active days and average start hour per weekday
+class TrainingPattern:
+    def __init__(self, workouts=()):
+        self.days = set()
+        self.weekday_days = [0] * 7
+        self.weekday_hours = [0.0] * 7
+        self.first_day = None
+        self.last_day = None
+        for workout in workouts:
+            self.add(workout)
+
+    def add(self, workout):
+        moment = datetime.datetime.fromisoformat(workout["date"])
+        day = moment.date().toordinal()
+        self.first_day = day if self.first_day is None else min(self.first_day, day)
+        self.last_day = day if self.last_day is None else max(self.last_day, day)
+        if day in self.days:
+            return
+        self.days.add(day)
+        weekday = moment.weekday()
+        self.weekday_days[weekday] += 1
+        self.weekday_hours[weekday] += moment.hour + moment.minute / 60
+
+    def usual_hour(self, weekday, today):
+        # Average start hour if weekday is a usual training day, else None
+        if self.first_day is None:
+            return None
+        weeks = (today.toordinal() - self.first_day) / 7
+        if weeks < MIN_WEEKS or self.weekday_days[weekday] < weeks * USUAL_DAY_SHARE:
+            return None
+        return self.weekday_hours[weekday] / self.weekday_days[weekday]
+
+    def reminder(self, now=None):
+        # Reminder text once the usual training time has passed today without a workout
+        now = now or datetime.datetime.now()
+        today = now.date()
+        if self.last_day == today.toordinal():
+            return None
+        hour = self.usual_hour(today.weekday(), today)
+        if hour is None or now.hour + now.minute / 60 < hour:
+            return None
+        return (f"You usually train on {WEEKDAYS[today.weekday()]}s around {int(hour):02d}:{int(hour % 1 * 60):02d} "
+                f"and haven't logged a workout yet today. Time for a session?")
+
+
+# Training patterns for every user plus the reminders due for them, at most
+# one per user per day. Fed as workouts are logged; check() runs as a scheduled job.
+class ReminderBoard:
+    def __init__(self):
+        self.patterns = {}
+        self.pending = {}
+        self.sent = {}
+        self._lock = threading.Lock()
+
+    def add(self, user, workout):
+        with self._lock:
+            if user not in self.patterns:
+                self.patterns[user] = TrainingPattern()
+            self.patterns[user].add(workout)
+            # A workout today answers any reminder still waiting
+            self.pending.pop(user, None)
+
+    def check(self, now=None):
+        # Returns {user: message} for reminders that became due since the last check
+        now = now or datetime.datetime.now()
+        today = now.date()
+        due = {}
+        with self._lock:
+            for user, pattern in self.patterns.items():
+                if self.sent.get(user) == today:
+                    continue
+                message = pattern.reminder(now)
+                if message:
+                    self.sent[user] = today
+                    self.pending[user] = message
+                    due[user] = message
+        return due
+
+    def pending_for(self, user):
+        # The user's reminder until they log a workout
+        with self._lock:
+            return self.pending.get(user)
@@ -0,0 +1,119 @@
+import csv
+import datetime
+import io
+
+from workout_trends import INTENSITY_FACTORS
+
+# Columns of a pasted / uploaded batch, in order; date and notes may be left out
+BATCH_COLUMNS = ("sport", "type", "duration", "intensity", "date", "notes")
+REQUIRED_FIELDS = ("sport", "type", "duration", "intensity")
+
+# Extra fields kept when present, from imported session files
+SESSION_FIELDS = ("distance_km", "avg_heart_rate", "session")
+
+# Longest single session accepted, in minutes
+MAX_DURATION = 24 * 60
+
+
+class BatchError(ValueError):
+    # Raised for a batch with invalid rows; nothing from it is applied.
+    # errors is [(row number, 1-based, message)].
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"row {row}: {message}" for row, message in errors))
+
+
+def parse_workout_rows(text):
+    # [(line number, record)] from CSV text, one workout per line in BATCH_COLUMNS
+    # order. A header line naming the columns is skipped; blank lines are ignored.
+    # Line numbers are 1-based in the text, so errors can point at the source line.
+    rows = []
+    reader = csv.reader(io.StringIO(text))
+    line = 1
+    for values in reader:
+        # A quoted field may span lines; the record starts where the last one ended
+        start, line = line, reader.line_num + 1
+        values = [value.strip() for value in values]
+        if not any(values):
+            continue
+        if not rows and values[0].lower() == "sport":
+            continue
+        rows.append((start, dict(zip(BATCH_COLUMNS, values))))
+    return rows
+
+
+def parse_date(value, now):
+    if value is None or value == "":
+        return now
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        # A bare day is logged at noon so it never drifts across midnight
+        return datetime.datetime.combine(value, datetime.time(12))
+    moment = datetime.datetime.fromisoformat(str(value).strip())
+    if len(str(value).strip()) == 10:
+        moment = moment.replace(hour=12)
+    return moment
+
+
+def validate_workout(record, now):
+    # One normalized workout from a record, or a ValueError naming the problem
+    missing = [field for field in REQUIRED_FIELDS if record.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    try:
+        duration = int(round(float(record["duration"])))
+    except (TypeError, ValueError):
+        raise ValueError(f"duration {record['duration']!r} is not a number")
+    if not 1 <= duration <= MAX_DURATION:
+        raise ValueError(f"duration must be between 1 and {MAX_DURATION} minutes")
+    intensity = str(record["intensity"]).strip().title()
+    if intensity not in INTENSITY_FACTORS:
+        raise ValueError(f"intensity must be one of {', '.join(INTENSITY_FACTORS)}")
+    try:
+        moment = parse_date(record.get("date"), now)
+    except ValueError:
+        raise ValueError(f"date {record['date']!r} is not an ISO date")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    if moment.date() > now.date():
+        raise ValueError("date is in the future")
+    workout = {
+        "date": moment.isoformat(),
+        "sport": str(record["sport"]).strip(),
+        "type": str(record["type"]).strip(),
+        "duration": duration,
+        "intensity": intensity,
+        "notes": str(record.get("notes") or "").strip()
+    }
+    for field in SESSION_FIELDS:
+        if record.get(field) not in (None, ""):
+            workout[field] = record[field]
+    return workout
+
+
+def validate_workouts(records, now=None):
+    # The whole batch as workouts, oldest first, or BatchError listing every bad row
+    now = now or datetime.datetime.now()
+    workouts = []
+    errors = []
+    for row, record in enumerate(records, start=1):
+        try:
+            workouts.append(validate_workout(record, now))
+        except ValueError as error:
+            errors.append((row, str(error)))
+    if errors:
+        raise BatchError(errors)
+    # Stable, so undated rows keep their order
+    workouts.sort(key=lambda workout: workout["date"])
+    return workouts
+
+
+def merge_history(history, workouts):
+    # Appends a sorted batch to a user's history, keeping the history in date
+    # order when the batch reaches back before its newest entry
+    backdated = history and workouts and workouts[0]["date"] < history[-1]["date"]
+    history.extend(workouts)
+    if backdated:
+        # Two sorted runs: timsort merges them in linear time
+        history.sort(key=lambda workout: workout["date"])
@@ -0,0 +1,147 @@
+import threading
+
+import numpy as np
+
+from workout_trends import intensity_factor, workout_minutes
+
+SPORTS = ["Football", "Basketball", "Tennis", "Running", "Cycling", "Swimming", "Other"]
+WORKOUT_TYPES = ["Cardio", "Strength", "Flexibility", "Skills", "Game", "Other"]
+INTENSITIES = ["Low", "Medium", "High"]
+
+# Relative weight of each feature group in the cosine similarity
+SPORT_WEIGHT = 1.0
+TYPE_WEIGHT = 1.0
+INTENSITY_WEIGHT = 0.5
+VOLUME_WEIGHT = 0.5
+
+# Session length that maps to a volume feature of 1.0
+VOLUME_SCALE_MINUTES = 120
+
+DEFAULT_NEIGHBOURS = 25
+DEFAULT_SUGGESTIONS = 3
+
+FEATURES = len(SPORTS) + len(WORKOUT_TYPES) + len(INTENSITIES) + 1
+
+
+def intensity_name(factor):
+    # Nearest named intensity for an averaged factor
+    return min(INTENSITIES, key=lambda name: abs(intensity_factor(name) - factor))
+
+
+# Nearest-neighbour index over per-user training profiles. Each user is one
+# unit-length row of a float32 matrix (sport mix, workout type mix, intensity
+# mix, average session length); a logged workout only rewrites that user's row
+# and a query is one matrix-vector product over all users.
+class WorkoutRecommender:
+    def __init__(self, capacity=1024):
+        self.vectors = np.zeros((capacity, FEATURES), dtype=np.float32)
+        self.users = []
+        self.rows = {}
+        # user -> raw counts the row is computed from
+        self.counts = {}
+        # user -> {(sport, type): [sessions, minutes, intensity factor total]}
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def add(self, user, workout):
+        self.add_many(user, [workout])
+
+    def add_many(self, user, workouts):
+        # The user's row is recomputed once for the whole batch
+        if not workouts:
+            return
+        with self._lock:
+            counts = self.counts.get(user)
+            if counts is None:
+                counts = self.counts[user] = np.zeros(FEATURES - 1, dtype=np.float64)
+                self.sessions[user] = {}
+                self._add_row(user)
+            for workout in workouts:
+                sport = workout["sport"] if workout["sport"] in SPORTS else "Other"
+                workout_type = workout.get("type") if workout.get("type") in WORKOUT_TYPES else "Other"
+                minutes = workout_minutes(workout)
+                factor = intensity_factor(workout.get("intensity"))
+                counts[SPORTS.index(sport)] += 1
+                counts[len(SPORTS) + WORKOUT_TYPES.index(workout_type)] += 1
+                intensity = intensity_name(factor)
+                counts[len(SPORTS) + len(WORKOUT_TYPES) + INTENSITIES.index(intensity)] += 1
+
+                entry = self.sessions[user].setdefault((sport, workout_type), [0, 0, 0.0])
+                entry[0] += 1
+                entry[1] += minutes
+                entry[2] += factor
+            self.vectors[self.rows[user]] = self._vector(user)
+
+    def _add_row(self, user):
+        if len(self.users) == len(self.vectors):
+            grown = np.zeros((len(self.vectors) * 2, FEATURES), dtype=np.float32)
+            grown[:len(self.vectors)] = self.vectors
+            self.vectors = grown
+        self.rows[user] = len(self.users)
+        self.users.append(user)
+
+    def _vector(self, user):
+        counts = self.counts[user]
+        total = counts[:len(SPORTS)].sum()
+        total_minutes = sum(entry[1] for entry in self.sessions[user].values())
+        sport_end = len(SPORTS)
+        type_end = sport_end + len(WORKOUT_TYPES)
+        vector = np.empty(FEATURES, dtype=np.float64)
+        vector[:sport_end] = counts[:sport_end] / total * SPORT_WEIGHT
+        vector[sport_end:type_end] = counts[sport_end:type_end] / total * TYPE_WEIGHT
+        vector[type_end:-1] = counts[type_end:] / total * INTENSITY_WEIGHT
+        vector[-1] = min(1.0, total_minutes / total / VOLUME_SCALE_MINUTES) * VOLUME_WEIGHT
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def neighbours(self, user, k=DEFAULT_NEIGHBOURS):
+        # [(user, cosine similarity)] most similar first, excluding the user
+        with self._lock:
+            row = self.rows.get(user)
+            if row is None or len(self.users) < 2:
+                return []
+            similarities = self.vectors[:len(self.users)] @ self.vectors[row]
+            similarities[row] = -1.0
+            k = min(k, len(self.users) - 1)
+            best = np.argpartition(-similarities, k - 1)[:k]
+            best = best[np.argsort(-similarities[best])]
+            return [(self.users[i], float(similarities[i])) for i in best]
+
+    def recommend(self, user, count=DEFAULT_SUGGESTIONS, k=DEFAULT_NEIGHBOURS):
+        # What the most similar athletes train, weighted by similarity, favouring
+        # sessions the user does less of themselves:
+        # [{"sport", "type", "minutes", "intensity", "athletes"}]
+        neighbours = self.neighbours(user, k)
+        with self._lock:
+            own = self.sessions.get(user, {})
+            own_total = sum(entry[0] for entry in own.values()) or 1
+            scores = {}
+            for neighbour, similarity in neighbours:
+                if similarity <= 0:
+                    continue
+                sessions = self.sessions[neighbour]
+                neighbour_total = sum(entry[0] for entry in sessions.values())
+                for key, (sessions_done, minutes, factors) in sessions.items():
+                    share = sessions_done / neighbour_total
+                    entry = scores.setdefault(key, [0.0, 0, 0, 0.0, 0])
+                    entry[0] += similarity * share
+                    entry[1] += sessions_done
+                    entry[2] += minutes
+                    entry[3] += factors
+                    entry[4] += 1
+            for key, entry in scores.items():
+                if key in own:
+                    entry[0] *= 1 - own[key][0] / own_total
+
+        ranked = sorted((item for item in scores.items() if item[1][0] > 0), key=lambda item: -item[1][0])[:count]
+        return [{
+            "sport": sport,
+            "type": workout_type,
+            "minutes": round(minutes / sessions_done),
+            "intensity": intensity_name(factors / sessions_done),
+            "athletes": athletes
+        } for (sport, workout_type), (_, sessions_done, minutes, factors, athletes) in ranked]
+
+
+def format_recommendation(recommendation):
+    return (f"{recommendation['sport']} {recommendation['type'].lower()}, ~{recommendation['minutes']} mins "
+            f"at {recommendation['intensity'].lower()} intensity ({recommendation['athletes']} similar athletes)")
@@ -0,0 +1,174 @@
+"""Materialized daily and weekly workout aggregates per user.
+
+Rollups are updated as workouts are logged; statistics and trend charts read
+them instead of scanning raw history. After importing or editing
+user_workouts.json by hand, rebuild them with:
+
+    python workout_rollups.py rebuild
+"""
+import argparse
+import datetime
+import json
+
+from workout_trends import intensity_factor, workout_minutes
+
+ROLLUPS_FILE = 'workout_rollups.json'
+WORKOUTS_FILE = 'user_workouts.json'
+
+
+def empty_bucket():
+    return {"count": 0, "minutes": 0, "volume": 0.0, "by_sport": {}, "by_intensity": {}}
+
+
+def add_to_bucket(bucket, sport, intensity, minutes, volume):
+    bucket["count"] += 1
+    bucket["minutes"] += minutes
+    bucket["volume"] += volume
+    for breakdown, key in ((bucket["by_sport"], sport), (bucket["by_intensity"], intensity)):
+        entry = breakdown.setdefault(key, {"count": 0, "minutes": 0})
+        entry["count"] += 1
+        entry["minutes"] += minutes
+
+
+class WorkoutRollups:
+    def __init__(self, workouts=()):
+        self.daily = {}
+        self.weekly = {}
+        self.totals = empty_bucket()
+        for workout in workouts:
+            self.add(workout)
+
+    def add(self, workout):
+        day = datetime.datetime.fromisoformat(workout["date"]).date()
+        monday = day - datetime.timedelta(days=day.weekday())
+        minutes = workout_minutes(workout)
+        volume = minutes * intensity_factor(workout.get("intensity"))
+        for bucket in (self.daily.setdefault(day.toordinal(), empty_bucket()),
+                       self.weekly.setdefault(monday.toordinal(), empty_bucket()),
+                       self.totals):
+            add_to_bucket(bucket, workout["sport"], workout.get("intensity"), minutes, volume)
+
+    @property
+    def workout_count(self):
+        return self.totals["count"]
+
+    def first_day(self):
+        return datetime.date.fromordinal(min(self.daily)) if self.daily else None
+
+    def daily_rows(self):
+        # [(date, minutes, volume, count)] oldest first, the input trend charts expect
+        return [(datetime.date.fromordinal(day), b["minutes"], b["volume"], b["count"])
+                for day, b in sorted(self.daily.items())]
+
+    def weekly_rows(self):
+        # Same shape, one row per Monday; weekly trend charts read these directly
+        return [(datetime.date.fromordinal(day), b["minutes"], b["volume"], b["count"])
+                for day, b in sorted(self.weekly.items())]
+
+    def progress_stats(self, today=None):
+        # Same shape as get_progress_stats, in O(sports) instead of O(workouts)
+        stats = {
+            "total_workouts": self.totals["count"],
+            "workouts_by_sport": {sport: entry["count"] for sport, entry in self.totals["by_sport"].items()},
+            "weekly_avg": 0,
+            "total_duration": self.totals["minutes"]
+        }
+        first_day = self.first_day()
+        if first_day is not None:
+            weeks = ((today or datetime.date.today()) - first_day).days / 7
+            stats["weekly_avg"] = self.totals["count"] / max(1, weeks)
+        return stats
+
+    def compact(self, before):
+        # Folds daily buckets older than the `before` date into one bucket per
+        # week, keyed by that week's earliest active day so weekly charts and
+        # the first day stay exact. A week straddling two months is folded into
+        # one bucket per month, so monthly charts stay exact too. Returns the
+        # number of buckets removed.
+        cutoff = before.toordinal()
+        old_days = sorted(day for day in self.daily if day < cutoff)
+        kept = {}
+        removed = 0
+        for day in old_days:
+            date = datetime.date.fromordinal(day)
+            monday = day - date.weekday()
+            key = kept.setdefault((monday, date.month), day)
+            if key == day:
+                continue
+            bucket = self.daily.pop(day)
+            target = self.daily[key]
+            target["count"] += bucket["count"]
+            target["minutes"] += bucket["minutes"]
+            target["volume"] += bucket["volume"]
+            for name in ("by_sport", "by_intensity"):
+                for breakdown_key, entry in bucket[name].items():
+                    merged = target[name].setdefault(breakdown_key, {"count": 0, "minutes": 0})
+                    merged["count"] += entry["count"]
+                    merged["minutes"] += entry["minutes"]
+            removed += 1
+        return removed
+
+    def to_dict(self):
+        return {
+            "daily": {str(day): bucket for day, bucket in self.daily.items()},
+            "weekly": {str(day): bucket for day, bucket in self.weekly.items()},
+            "totals": self.totals
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        rollups = cls()
+        rollups.daily = {int(day): bucket for day, bucket in data["daily"].items()}
+        rollups.weekly = {int(day): bucket for day, bucket in data["weekly"].items()}
+        rollups.totals = data["totals"]
+        return rollups
+
+
+def load_rollups(workouts_by_user, path=ROLLUPS_FILE):
+    # Reuse stored rollups whose workout count still matches; rebuild the rest
+    try:
+        with open(path, 'r') as f:
+            stored = json.load(f)
+    except:
+        stored = {}
+
+    rollups = {}
+    for user, workouts in workouts_by_user.items():
+        if user in stored and stored[user]["totals"]["count"] == len(workouts):
+            rollups[user] = WorkoutRollups.from_dict(stored[user])
+        else:
+            rollups[user] = WorkoutRollups(workouts)
+    return rollups
+
+
+def dump_rollups(rollups):
+    return json.dumps({user: r.to_dict() for user, r in rollups.items()})
+
+
+def save_rollups(rollups, path=ROLLUPS_FILE):
+    with open(path, 'w') as f:
+        f.write(dump_rollups(rollups))
+
+
+def rebuild(workouts_path=WORKOUTS_FILE, rollups_path=ROLLUPS_FILE):
+    with open(workouts_path, 'r') as f:
+        workouts_by_user = json.load(f)
+    rollups = {user: WorkoutRollups(workouts) for user, workouts in workouts_by_user.items()}
+    save_rollups(rollups, rollups_path)
+    return rollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage SportsPal workout rollups")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--workouts", default=WORKOUTS_FILE)
+    parser.add_argument("--out", default=ROLLUPS_FILE)
+    args = parser.parse_args()
+
+    rollups = rebuild(args.workouts, args.out)
+    total = sum(r.workout_count for r in rollups.values())
+    print(f"Rebuilt rollups for {len(rollups)} users ({total} workouts) into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import datetime
+
+# Training volume = minutes x intensity factor
+INTENSITY_FACTORS = {"Low": 1.0, "Medium": 2.0, "High": 3.0}
+
+# Points sent to a chart, whatever the length of the history
+DEFAULT_MAX_POINTS = 150
+
+
+def intensity_factor(intensity):
+    return INTENSITY_FACTORS.get(intensity, INTENSITY_FACTORS["Medium"])
+
+
+def workout_minutes(workout):
+    try:
+        return int(workout["duration"])
+    except:
+        return 0
+
+
+def bucket_start(day, bucket):
+    if bucket == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def choose_bucket(span_days):
+    # Keep the number of buckets in the low hundreds before downsampling
+    if span_days <= 120:
+        return "day"
+    if span_days <= 3 * 365:
+        return "week"
+    return "month"
+
+
+def rebucket(daily_rows, bucket="day"):
+    # Rolls daily rows [(date, minutes, volume, count)] up into week or month buckets
+    if bucket == "day":
+        return list(daily_rows)
+    totals = {}
+    for day, minutes, volume, count in daily_rows:
+        entry = totals.setdefault(bucket_start(day, bucket), [0, 0.0, 0])
+        entry[0] += minutes
+        entry[1] += volume
+        entry[2] += count
+    return [(key, minutes, volume, count) for key, (minutes, volume, count) in sorted(totals.items())]
+
+
+def lttb(points, threshold):
+    # Largest-Triangle-Three-Buckets: keeps the first and last point and, for
+    # each bucket in between, the point forming the largest triangle with the
+    # previously kept point and the next bucket's average. Preserves peaks and
+    # troughs far better than striding or averaging.
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_count = max(1, avg_end - avg_start)
+        avg_x = sum(points[j][0] for j in range(avg_start, avg_end)) / avg_count
+        avg_y = sum(points[j][1] for j in range(avg_start, avg_end)) / avg_count
+
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        ax, ay = points[a]
+        best_area = -1.0
+        best = range_start
+        for j in range(range_start, range_end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def trend_series(daily_rows, bucket=None, max_points=DEFAULT_MAX_POINTS, weekly_rows=None):
+    # Bucketed, downsampled minutes and volume series ready for plotting, from
+    # the daily rollup rows: {"bucket": ..., "minutes": [(date, value)], "volume": [(date, value)]}.
+    # Weekly charts read the weekly rollup rows as they are when given
+    if not daily_rows:
+        return {"bucket": bucket or "day", "minutes": [], "volume": []}
+
+    if bucket is None:
+        bucket = choose_bucket((daily_rows[-1][0] - daily_rows[0][0]).days)
+
+    if bucket == "week" and weekly_rows is not None:
+        rows = weekly_rows
+    else:
+        rows = rebucket(daily_rows, bucket)
+    minutes = [(day.toordinal(), value) for day, value, _, _ in rows]
+    volume = [(day.toordinal(), value) for day, _, value, _ in rows]
+    return {
+        "bucket": bucket,
+        "minutes": [(datetime.date.fromordinal(x), y) for x, y in lttb(minutes, max_points)],
+        "volume": [(datetime.date.fromordinal(x), y) for x, y in lttb(volume, max_points)],
+    }